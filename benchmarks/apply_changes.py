@@ -0,0 +1,123 @@
+"""
+Compare applying changes to a file in the previous way, which replaced a list
+slice per assert and then applied doctests by line number, with the current
+single pass over the original content.
+
+Each file has a failing doctest and a failing assert, whose expected value
+spans several lines, per function, so the number of changes and the length of
+the file grow together.
+
+    python benchmarks/apply_changes.py --changes 1000 10000 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import textwrap
+import time
+
+from pytest_accept import AssertChange, DoctestChange, _apply_changes
+
+BLOCK = '''\
+def f_{i}():
+    """
+    >>> f_{i}()
+    0
+    """
+    return {i}
+
+def test_{i}():
+    assert f_{i}() == [
+        -1,
+    ]
+'''
+BLOCK_LINES = BLOCK.count("\n")
+
+
+def _changes(n: int) -> list:
+    changes = []
+    for i in range(n):
+        first = i * BLOCK_LINES
+        column = len("    assert f_() == ") + len(str(i))
+        changes.append(
+            AssertChange(
+                priority=1,
+                location=slice(first + 9, first + 11),
+                columns=(column, len("    ]")),
+                source=str(i),
+            )
+        )
+        changes.append(
+            DoctestChange(
+                priority=2,
+                location=slice(first + 3, first + 4),
+                source_line=first + 2,
+                output=str(i),
+            )
+        )
+    return changes
+
+
+def _legacy_apply(original: list[str], changes: list) -> list[str]:
+    # The previous way applied asserts first, which put doctests after an
+    # assert that changes the number of lines in the wrong place. Doctests
+    # don't change the number of lines here, so applying them first is correct
+    # and costs the same.
+    doctests = [c for c in changes if isinstance(c, DoctestChange)]
+    result = []
+    position = 0
+    for change in sorted(doctests, key=lambda c: c.location.start):
+        result.extend(original[position : change.location.start])
+        match = re.match(r"\s*", original[change.source_line])
+        existing_indent = match.group() if match else ""
+        indented = textwrap.indent(change.output, prefix=existing_indent)
+        result.extend(indented.splitlines())
+        position = change.location.stop
+    result.extend(original[position:])
+
+    asserts = [c for c in changes if isinstance(c, AssertChange)]
+    for change in sorted(asserts, key=lambda c: c.site, reverse=True):
+        start, stop = change.location.start, change.location.stop
+        start_col, stop_col = change.columns
+        prefix = result[start - 1].encode("utf-8")[:start_col]
+        suffix = result[stop - 1].encode("utf-8")[stop_col:]
+        replaced = prefix + change.source.encode("utf-8") + suffix
+        result[start - 1 : stop] = replaced.decode("utf-8").splitlines()
+    return result
+
+
+def _time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--changes", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    print(f"{'changes':>10}{'previous':>12}{'current':>12}   (ms per file)")
+    for n in options.changes:
+        text = "".join(BLOCK.format(i=i) for i in range(n))
+        lines = text.splitlines()
+        original = text.encode("utf-8")
+        changes = _changes(n)
+
+        pieces, rejected = _apply_changes(original, changes)
+        assert not rejected
+        content = b"".join(pieces).decode("utf-8")
+        assert content.splitlines() == _legacy_apply(lines, changes)
+
+        previous = _time(lambda: _legacy_apply(lines, changes), options.repeat)
+        current = _time(lambda: _apply_changes(original, changes), options.repeat)
+        print(f"{2 * n:>10}{previous * 1e3:>12.1f}{current * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the per-test overhead of the engines that intercept failing asserts.
+
+Generates a test module, then times pytest running it without the plugin
+active and under each `--accept-engine`, for tests whose asserts all pass and
+for tests whose assert fails. Runs with `--accept-copy`, so nothing is
+overwritten.
+
+    python benchmarks/engines.py --tests 2000 --repeat 5
+
+The monitoring engine requires Python 3.12+.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PASSING_TEST = """
+def test_passing_{i}():
+    for x in range({asserts}):
+        assert x * 0 == 0
+"""
+
+FAILING_TEST = """
+def test_failing_{i}():
+    assert {i} == -1
+"""
+
+
+def _time_pytest(directory: Path, args: list[str], repeat: int) -> float:
+    """Return the fastest wall time of running pytest on `directory`"""
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *args]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=directory, capture_output=True, check=False)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tests", type=int, default=1000)
+    parser.add_argument("--asserts", type=int, default=100, help="per passing test")
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    engines = ["rewrite"]
+    if sys.version_info >= (3, 12):
+        engines.append("monitoring")
+
+    configurations = {"plugin inactive": []} | {
+        f"--accept-engine={engine}": ["--accept-copy", f"--accept-engine={engine}"]
+        for engine in engines
+    }
+
+    print(f"{'':<28}{'passing':>12}{'failing':>12}   (µs per test)")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for label, args in configurations.items():
+            row = []
+            for template in (PASSING_TEST, FAILING_TEST):
+                for path in directory.glob("test_*"):
+                    path.unlink()
+                (directory / "test_bench.py").write_text(
+                    "".join(
+                        template.format(i=i, asserts=options.asserts)
+                        for i in range(options.tests)
+                    )
+                )
+                seconds = _time_pytest(directory, args, options.repeat)
+                row.append(seconds / options.tests * 1e6)
+            print(f"{label:<28}{row[0]:>12.1f}{row[1]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
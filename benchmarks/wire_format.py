@@ -0,0 +1,98 @@
+"""
+Compare sending doctest changes between processes in the previous format, which
+shipped each failure's `got` and `want` and rendered them on the controller,
+with the current one, which renders on the worker and compresses large output.
+
+Each round trip serializes changes with execnet, as xdist does, and
+deserializes them ready to write.
+
+    python benchmarks/wire_format.py --changes 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import execnet
+
+from pytest_accept import DoctestChange, _to_doctest_format
+
+
+def _failure(i: int, large: bool) -> SimpleNamespace:
+    # Most failures have a line or two of output; a few print pages of it
+    got = "\n".join(f"row {n} of {i}" for n in range(5000 if large else 2)) + "\n"
+    return SimpleNamespace(
+        test=SimpleNamespace(filename="test_module.py", lineno=10 * i),
+        example=SimpleNamespace(
+            lineno=1, source="print_table()\n", want="row 0\nrow 1\n"
+        ),
+        got=got,
+    )
+
+
+def _legacy_to_dict(failure) -> dict:
+    return {
+        "kind": "doctest",
+        "priority": 2,
+        "test": {"filename": failure.test.filename, "lineno": failure.test.lineno},
+        "example": {
+            "lineno": failure.example.lineno,
+            "source": failure.example.source,
+            "want": failure.example.want,
+        },
+        "got": failure.got,
+    }
+
+
+def _legacy_from_dict(d: dict) -> str:
+    failure = SimpleNamespace(
+        test=SimpleNamespace(**d["test"]),
+        example=SimpleNamespace(**d["example"]),
+        got=d["got"],
+    )
+    return _to_doctest_format(failure.got)
+
+
+def _legacy_round_trip(failures) -> int:
+    payload = execnet.dumps([_legacy_to_dict(failure) for failure in failures])
+    for d in execnet.loads(payload):
+        _legacy_from_dict(d)
+    return len(payload)
+
+
+def _round_trip(failures) -> int:
+    payload = execnet.dumps(
+        [DoctestChange.from_failure(failure).to_dict() for failure in failures]
+    )
+    for d in execnet.loads(payload):
+        DoctestChange.from_dict(d)
+    return len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--changes", type=int, default=100_000)
+    parser.add_argument(
+        "--large-every", type=int, default=1000, help="one in N has large output"
+    )
+    options = parser.parse_args()
+
+    failures = [
+        _failure(i, large=i % options.large_every == 0) for i in range(options.changes)
+    ]
+
+    print(f"{'':<10}{'changes/s':>12}{'MB sent':>10}")
+    for label, round_trip in [
+        ("previous", _legacy_round_trip),
+        ("current", _round_trip),
+    ]:
+        start = time.perf_counter()
+        size = round_trip(failures)
+        seconds = time.perf_counter() - start
+        print(f"{label:<10}{options.changes / seconds:>12,.0f}{size / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
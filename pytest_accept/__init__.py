@@ -2,7 +2,6 @@
 
 This plugin uses several private pytest APIs that may change between versions:
 - _pytest.assertion.rewrite.AssertionRewriter: For intercepting assertion failures
-- _pytest._code.code.ExceptionInfo: For processing exception information
 - _pytest.doctest.DoctestItem, MultipleDoctestFailures: For identifying doctest failures
 
 If these APIs are not available, the plugin will disable itself with a warning.
@@ -11,19 +10,25 @@ If these APIs are not available, the plugin will disable itself with a warning.
 from __future__ import annotations
 
 import logging
+import os
 import re
-import textwrap
+import sys
+import zlib
 from abc import ABC, abstractmethod
+from collections import Counter
 from dataclasses import dataclass
-from doctest import DocTestFailure
+from functools import partial
 from importlib.metadata import PackageNotFoundError, version
-from itertools import zip_longest
+from itertools import accumulate
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import astor
 import pytest
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from doctest import DocTestFailure
+
 # Package version
 try:
     __version__ = version("pytest-accept")
@@ -34,28 +39,34 @@ except PackageNotFoundError:
 logger = logging.getLogger(__name__)
 
 # ===== StashKey instances =====
-# Using Any type for forward reference - actual type is dict[Path, list[Change]]
+# Using Any type for forward reference - actual type is ChangeStore
 file_changes_key = pytest.StashKey[Any]()
-file_hashes_key = pytest.StashKey[dict[Path, int]]()
+# Actual type is dict[Path, common.Fingerprint]
+file_fingerprints_key = pytest.StashKey[dict[Path, Any]]()
 
 # ===== xdist communication keys =====
-# These are used as dictionary keys in slaveinput/workeroutput for xdist communication
-XDIST_FILE_CHANGES_KEY = "file_changes"
-XDIST_FILE_HASHES_KEY = "file_hashes"
-
-# StashKeys for assertion tracking
-recent_failure_key = pytest.StashKey[list[tuple]]()
+# The attribute of a test report that carries a worker's changes to the controller
+XDIST_FILE_CHANGES_KEY = "pytest_accept_file_changes"
 
 # StashKey to store session reference in config for access during assertion handling
 session_ref_key = pytest.StashKey[Any]()  # Actually pytest.Session
 
+# StashKey marking a config whose session patched the assertion rewriter
+rewriter_patched_key = pytest.StashKey[bool]()
+
+# StashKey counting the files written, and those left as they were because the
+# changes didn't alter them, for the terminal summary
+write_counts_key = pytest.StashKey[Counter[str]]()
+
 
 # ===== Change Classes =====
 @dataclass
 class Change(ABC):
     """Base class for file changes"""
 
-    priority: int  # Execution order: assert=1, doctest=2
+    priority: (
+        int  # Which of two changes starting at one place wins: assert=1, doctest=2
+    )
 
     @property
     @abstractmethod
@@ -63,6 +74,29 @@ class Change(ABC):
         """Return the kind of change (e.g., 'assert', 'doctest')"""
         pass
 
+    @property
+    @abstractmethod
+    def site(self) -> tuple:
+        """Identify the part of the file the change replaces"""
+        pass
+
+    @property
+    @abstractmethod
+    def lineno(self) -> int:
+        """Return the 1-based line the change starts on, for messages"""
+        pass
+
+    @abstractmethod
+    def edit(
+        self, original: bytes, line_starts: list[int], newline: str
+    ) -> tuple[int, int, bytes]:
+        """
+        Return the byte range of `original` the change replaces, and what it
+        replaces it with. `line_starts` holds the offset of each line, and
+        `newline` is the file's line ending.
+        """
+        pass
+
     @abstractmethod
     def to_dict(self) -> dict:
         """Convert to a serializable dictionary for xdist"""
@@ -84,81 +118,215 @@ class Change(ABC):
 class AssertChange(Change):
     """Represents an assertion change"""
 
-    location: slice  # Line range in the file
-    ast_node: Any  # The new AST node
+    location: slice  # Line range of the expected value in the file
+    columns: tuple[int, int]  # UTF-8 offsets of its start & end within those lines
+    source: str  # The new expected value
 
     @property
     def kind(self) -> str:
         return "assert"
 
+    @property
+    def site(self) -> tuple:
+        return (self.kind, self.location.start, self.columns[0])
+
+    @property
+    def lineno(self) -> int:
+        return self.location.start
+
+    def edit(
+        self, original: bytes, line_starts: list[int], newline: str
+    ) -> tuple[int, int, bytes]:
+        start = line_starts[self.location.start - 1] + self.columns[0]
+        stop = line_starts[self.location.stop - 1] + self.columns[1]
+        return start, stop, self.source.encode("utf-8")
+
     def to_dict(self) -> dict:
         """Convert to a serializable dictionary"""
-        import astor
-
         return {
             "kind": self.kind,
             "priority": self.priority,
             "location": (self.location.start, self.location.stop),
-            "source": astor.to_source(self.ast_node).strip(),
+            "columns": self.columns,
+            "source": _pack_text(self.source),
         }
 
     @classmethod
     def from_dict(cls, d: dict) -> AssertChange:
         """Reconstruct from dictionary"""
-        import ast
-
-        ast_node = ast.parse(d["source"]).body[0]
         location = slice(d["location"][0], d["location"][1])
-        return cls(priority=d["priority"], location=location, ast_node=ast_node)
+        return cls(
+            priority=d["priority"],
+            location=location,
+            columns=tuple(d["columns"]),
+            source=_unpack_text(d["source"]),
+        )
 
 
 @dataclass
 class DoctestChange(Change):
     """Represents a doctest change"""
 
-    failure: Any  # DocTestFailure object
+    location: slice  # 0-based line range of the example's expected output
+    source_line: int  # 0-based line of the example's `>>>`, for its indentation
+    output: str  # The new output, in doctest format
 
     @property
     def kind(self) -> str:
         return "doctest"
 
+    @property
+    def site(self) -> tuple:
+        return (self.kind, self.location.start)
+
+    @property
+    def lineno(self) -> int:
+        return self.location.start + 1
+
+    @classmethod
+    def from_failure(cls, failure: DocTestFailure) -> DoctestChange:
+        """
+        Render a doctest failure, keeping only what's needed to write it, rather
+        than the failure, which holds on to the doctest's namespace.
+        """
+        start = _snapshot_start_line(failure)
+        assert failure.test.lineno is not None
+        return cls(
+            priority=2,  # Doctest changes run after assert changes
+            location=slice(start, start + len(failure.example.want.splitlines())),
+            source_line=failure.test.lineno + failure.example.lineno,
+            output=_to_doctest_format(failure.got),
+        )
+
+    def edit(
+        self, original: bytes, line_starts: list[int], newline: str
+    ) -> tuple[int, int, bytes]:
+        # Get indentation from the >>> source line of the example, not from the
+        # start of its output, which may be an empty line (issue #296)
+        match = _INDENT.match(original, line_starts[self.source_line])
+        indent = match.group().decode("utf-8") if match else ""
+        # Indent as `textwrap.indent` does, leaving whitespace-only lines alone
+        replacement = "".join(
+            f"{indent}{line}{newline}" if line.strip() else f"{line}{newline}"
+            for line in self.output.splitlines()
+        )
+        start = _line_start(self.location.start, original, line_starts)
+        stop = _line_start(self.location.stop, original, line_starts)
+
+        # At the end of a file without a final newline, keep it without one
+        if stop == len(original) and original and not original.endswith(b"\n"):
+            if start == stop and replacement:
+                # The output follows the example's last line
+                replacement = newline + replacement[: -len(newline)]
+            elif replacement:
+                replacement = replacement[: -len(newline)]
+            elif start < stop:
+                # Remove the newline ending the line before the output
+                start -= len(newline)
+
+        return start, stop, replacement.encode("utf-8")
+
     def to_dict(self) -> dict:
         """Convert to a serializable dictionary"""
         return {
             "kind": self.kind,
             "priority": self.priority,
-            "test": {
-                "filename": str(self.failure.test.filename),
-                "lineno": self.failure.test.lineno,
-            },
-            "example": {
-                "lineno": self.failure.example.lineno,
-                "source": self.failure.example.source,
-                "want": self.failure.example.want,
-            },
-            "got": self.failure.got,
+            "location": (self.location.start, self.location.stop),
+            "source_line": self.source_line,
+            "output": _pack_text(self.output),
         }
 
     @classmethod
     def from_dict(cls, d: dict) -> DoctestChange:
         """Reconstruct from dictionary"""
-        from types import SimpleNamespace
-
-        failure = SimpleNamespace(
-            test=SimpleNamespace(
-                filename=d["test"]["filename"], lineno=d["test"]["lineno"]
-            ),
-            example=SimpleNamespace(
-                lineno=d["example"]["lineno"],
-                source=d["example"]["source"],
-                want=d["example"]["want"],
-            ),
-            got=d["got"],
+        location = slice(d["location"][0], d["location"][1])
+        return cls(
+            priority=d["priority"],
+            location=location,
+            source_line=d["source_line"],
+            output=_unpack_text(d["output"]),
         )
-        return cls(priority=d["priority"], failure=failure)
+
+
+class ChangeStore:
+    """
+    The changes to write to each file, indexed by the site they change.
+
+    A site can be hit many times, e.g. by an assert in a loop or a parametrized
+    test. Hits with the same value are stored once. A site that gets different
+    values has no single value to accept, so it's a conflict, and isn't written.
+    Only two values are kept per site, enough to tell a conflict, so memory
+    grows with the number of sites rather than failures.
+    """
+
+    def __init__(self):
+        self._sites: dict[Path, dict[tuple, list[Change]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._sites)
+
+    def add(self, path: Path, change: Change) -> None:
+        values = self._sites.setdefault(path, {}).setdefault(change.site, [])
+        if len(values) < 2 and change not in values:
+            values.append(change)
+
+    def paths(self) -> list[Path]:
+        return list(self._sites)
+
+    def changes(self, path: Path) -> list[Change]:
+        """Return the changes to a file, excluding conflicts"""
+        return [
+            values[0]
+            for values in self._sites.get(path, {}).values()
+            if len(values) == 1
+        ]
+
+    def conflicts(self, path: Path) -> list[Change]:
+        """Return the first value of each site in a file with conflicting values"""
+        return [
+            values[0]
+            for values in self._sites.get(path, {}).values()
+            if len(values) > 1
+        ]
+
+    def clear(self) -> None:
+        self._sites.clear()
+
+    def to_dict(self) -> dict:
+        """Convert to a serializable dictionary, including conflicting values"""
+        return {
+            str(path): [
+                change.to_dict() for values in sites.values() for change in values
+            ]
+            for path, sites in self._sites.items()
+        }
+
+    def add_from_dict(self, d: dict) -> None:
+        """Add the changes from another store's `to_dict`"""
+        for path_str, change_dicts in d.items():
+            for change_dict in change_dicts:
+                self.add(Path(path_str), Change.from_dict(change_dict))
 
 
 # ===== Helper Functions =====
+# Text larger than this is compressed when sent between processes
+_COMPRESS_THRESHOLD = 1 << 14
+
+
+def _pack_text(text: str) -> str | bytes:
+    """Prepare text for sending to another process, compressing it if it's large"""
+    if len(text) <= _COMPRESS_THRESHOLD:
+        return text
+    return zlib.compress(text.encode("utf-8"), 1)
+
+
+def _unpack_text(packed: str | bytes) -> str:
+    """Reverse `_pack_text`"""
+    if isinstance(packed, bytes):
+        return zlib.decompress(packed).decode("utf-8")
+    return packed
+
+
 def _snapshot_start_line(failure: DocTestFailure) -> int:
     """Calculate the line where doctest snapshot should start"""
     assert failure.test.lineno is not None
@@ -193,176 +361,220 @@ def _redact_volatile(output: str) -> str:
     return temp_paths
 
 
-def _apply_assert_changes(
-    original: list[str], assert_changes: list[AssertChange]
-) -> list[str]:
-    """Apply assert plugin changes to file content"""
-    result = original.copy()
+_INDENT = re.compile(rb"[ \t]*")
 
-    # Sort by line number
-    assert_changes = sorted(assert_changes, key=lambda c: c.location.start)
 
-    # Apply changes from end to beginning to avoid line number shifts
-    for change in reversed(assert_changes):
-        # Replace lines in the location range
-        indent = result[change.location.start - 1][
-            : len(result[change.location.start - 1])
-            - len(result[change.location.start - 1].lstrip())
-        ]
-        source = astor.to_source(change.ast_node).splitlines()
-        indented_source = [indent + line for line in source]
-
-        # Replace the range of lines
-        result[change.location.start - 1 : change.location.stop] = indented_source
-
-    return result
+def _line_start(line: int, original: bytes, line_starts: list[int]) -> int:
+    """Return the offset of a 0-based line, or the end of the file past its last"""
+    return line_starts[line] if line < len(line_starts) else len(original)
 
 
-def _apply_doctest_changes(
-    original: list[str], doctest_changes: list[DoctestChange]
-) -> list[str]:
-    """Apply doctest plugin changes to file content"""
-    # Extract failures and sort by line number
-    failures = [c.failure for c in doctest_changes]
-    failures = sorted(failures, key=lambda x: x.test.lineno or 0)
+def _apply_changes(
+    original: bytes, changes: list[Change]
+) -> tuple[list[bytes | memoryview], list[Change]]:
+    """
+    Apply changes to a file's content in a single pass.
 
-    if not failures:
-        return original
+    Every change's position is taken from the original content, so changes of
+    either kind can't shift each other. Returns the pieces of the new content —
+    views of the unchanged parts of `original`, between the replacements — and
+    the changes that weren't applied because they overlap another.
+    """
+    first_line = original[: original.find(b"\n") + 1]
+    newline = "\r\n" if first_line.endswith(b"\r\n") else "\n"
+    line_starts = list(
+        accumulate((len(line) + 1 for line in original.split(b"\n")), initial=0)
+    )
+    # The last entry is one past the end of the file
+    line_starts.pop()
+    edits = sorted(
+        ((*change.edit(original, line_starts, newline), change) for change in changes),
+        key=lambda edit: (edit[0], edit[3].priority, edit[1]),
+    )
 
-    result = []
+    view = memoryview(original)
+    pieces: list[bytes | memoryview] = []
+    rejected = []
+    position = 0
+    last_start = -1
+    for start, stop, replacement, change in edits:
+        # Two changes at the same place would be written in an arbitrary order,
+        # even if neither replaces anything
+        if start < position or start == last_start:
+            rejected.append(change)
+            continue
+        pieces += (view[position:start], replacement)
+        position = stop
+        last_start = start
+    pieces.append(view[position:])
 
-    # Interleave original content with updated doctest outputs
-    first_failure = failures[0]
-    next_start_line = _snapshot_start_line(first_failure)
-    result.extend(original[:next_start_line])
+    return pieces, rejected
 
-    for current, next_failure in zip_longest(failures, failures[1:]):
-        # Get indentation from the >>> source line of the current example,
-        # not from next_start_line which may be an empty line (issue #296)
-        source_line_idx = current.test.lineno + current.example.lineno
-        match = re.match(r"\s*", original[source_line_idx])
-        existing_indent = match.group() if match else ""
-        snapshot_result = _to_doctest_format(current.got)
-        indented = textwrap.indent(snapshot_result, prefix=existing_indent)
-        result.extend(indented.splitlines())
 
-        current_finish_line = _snapshot_start_line(current) + len(
-            current.example.want.splitlines()
-        )
-        next_start_line = (
-            _snapshot_start_line(next_failure) if next_failure else len(original)
-        )
+# ===== Plugin Hooks =====
+# Only the hooks in this module are registered when pytest loads the plugin. The
+# hooks that do the work are registered by `pytest_configure`, and only in
+# accept mode, so an installed plugin costs nothing per file or test without it.
+from .common import (
+    BatchWriter,
+    atomic_write,
+    get_target_path,
+    has_file_changed,
+    is_accept_mode,
+    track_file,
+)
 
-        result.extend(original[current_finish_line:next_start_line])
 
-    return result
+def pytest_addoption(parser):
+    """Add pytest-accept options to pytest"""
+    group = parser.getgroup("accept", "accept test plugin")
+    group.addoption(
+        "--accept",
+        action="store_true",
+        default=False,
+        help="Accept the output of doctests, overwriting python files with generated results.",
+    )
+    group.addoption(
+        "--accept-copy",
+        action="store_true",
+        default=False,
+        help="Write a copy of python file named `.py.new` with the generated results of doctests.",
+    )
+    group.addoption(
+        "--accept-engine",
+        choices=["rewrite", "monitoring"],
+        default="rewrite",
+        help="How to intercept failing asserts. `rewrite` (the default) rewrites asserts "
+        "so a test continues past each failure it accepts. `monitoring` uses "
+        "sys.monitoring (Python 3.12+), leaving asserts as pytest rewrites them, and "
+        "accepts only the first failing assert in each test.",
+    )
+    group.addoption(
+        "--accept-durability",
+        choices=["none", "file", "batch"],
+        default="file",
+        help="How to make sure written files survive a crash. `file` (the default) "
+        "syncs each file and its directory as it's written. `batch` writes every "
+        "file before syncing and renaming them into place together, syncing each "
+        "directory once. `none` leaves it to the OS, e.g. for CI on tmpfs.",
+    )
+    group.addoption(
+        "--accept-transaction",
+        action="store_true",
+        default=False,
+        help="Write every file or none. Each file is written to a temporary file, "
+        "and only once all are written are they renamed into place. If any rename "
+        "fails, those already made are undone.",
+    )
+    group.addoption(
+        "--accept-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="How many files to write at once. Defaults to a few more than the "
+        "number of CPUs, since writing is mostly waiting on the disk.",
+    )
 
 
-# ===== Import hooks from submodules =====
-from .assert_plugin import (
-    pytest_assertrepr_compare as assert_assertrepr_compare,
-)
-from .assert_plugin import (
-    pytest_collection_modifyitems as assert_collection_modifyitems,
-)
-from .assert_plugin import (
-    pytest_sessionstart as assert_sessionstart,
-)
-from .common import atomic_write, get_target_path, has_file_changed, is_accept_mode
-from .doctest_plugin import (
-    pytest_addoption as doctest_addoption,
-)
-from .doctest_plugin import (
-    pytest_collect_file,
-    pytest_runtest_makereport,
-)
+def pytest_configure(config):
+    """Register the plugin's hooks when in accept mode"""
+    if not is_accept_mode(config):
+        return
 
-# Direct exports for simple pass-through hooks
-pytest_sessionstart = assert_sessionstart
-pytest_collection_modifyitems = assert_collection_modifyitems
-pytest_assertrepr_compare = assert_assertrepr_compare
-pytest_addoption = doctest_addoption
+    # Check the private APIs we use are available
+    try:
+        from _pytest.assertion.rewrite import AssertionRewriter
+        from _pytest.doctest import DoctestItem, MultipleDoctestFailures
+
+        # Verify the specific attributes we need exist
+        if not hasattr(AssertionRewriter, "visit_Assert"):
+            raise AttributeError("AssertionRewriter.visit_Assert not found")
+        # Just check that doctest types exist (imported above)
+        _ = (DoctestItem, MultipleDoctestFailures)
+
+    except (ImportError, AttributeError) as e:
+        # Disable accept mode and warn the user
+        config.option.accept = False
+        config.option.accept_copy = False
+        logger.warning(
+            f"pytest-accept: Disabling --accept mode due to missing pytest internals: {e}. "
+            f"This version of pytest may not be compatible with pytest-accept."
+        )
+        return
 
+    jobs = config.getoption("--accept-jobs")
+    if jobs is not None and jobs < 1:
+        raise pytest.UsageError(f"--accept-jobs must be at least 1, not {jobs}")
 
-# ===== Plugin Hooks =====
-def pytest_configure(config):
-    """Initialize plugin configuration"""
-    # Check if private APIs are available when in accept mode
-    if config.getoption("--accept") or config.getoption("--accept-copy"):
-        try:
-            # Check all required private APIs
-            from _pytest._code.code import ExceptionInfo
-            from _pytest.assertion.rewrite import AssertionRewriter
-            from _pytest.doctest import DoctestItem, MultipleDoctestFailures
-
-            # Verify the specific attributes we need exist
-            if not hasattr(AssertionRewriter, "visit_Assert"):
-                raise AttributeError("AssertionRewriter.visit_Assert not found")
-            if not hasattr(ExceptionInfo, "from_exc_info"):
-                raise AttributeError("ExceptionInfo.from_exc_info not found")
-            # Just check that doctest types exist (imported above)
-            _ = (DoctestItem, MultipleDoctestFailures)
-
-        except (ImportError, AttributeError) as e:
-            # Disable accept mode and warn the user
-            config.option.accept = False
-            config.option.accept_copy = False
-            logger.warning(
-                f"pytest-accept: Disabling --accept mode due to missing pytest internals: {e}. "
-                f"This version of pytest may not be compatible with pytest-accept."
+    # The monitoring engine replaces patching the assertion rewriter
+    if config.getoption("--accept-engine") == "monitoring":
+        if not hasattr(sys, "monitoring"):
+            raise pytest.UsageError(
+                "--accept-engine=monitoring requires Python 3.12 or later"
             )
+        from .monitoring import MonitoringEngine
 
-    # Call the doctest configure
-    from .doctest_plugin import pytest_configure as doctest_configure
+        config.pluginmanager.register(MonitoringEngine(), "accept-monitoring")
 
-    doctest_configure(config)
+    # The submodules' hooks, including the doctest plugin's `pytest_configure`,
+    # which pytest calls as soon as it's registered
+    from . import assert_plugin, doctest_plugin
 
-    # This hook runs on both master and workers, so we need to check
-    # if we're a worker by looking for slaveinput (only exists on workers)
-    if hasattr(config, "slaveinput") and XDIST_FILE_HASHES_KEY in config.slaveinput:
-        # Convert string keys back to Path objects
-        serialized_hashes = config.slaveinput[XDIST_FILE_HASHES_KEY]
-        file_hashes = {
-            Path(path_str): hash_val for path_str, hash_val in serialized_hashes.items()
-        }
-        config.stash[file_hashes_key] = file_hashes
+    config.pluginmanager.register(assert_plugin, "accept-assert")
+    config.pluginmanager.register(doctest_plugin, "accept-doctest")
 
     # Register xdist hooks only if xdist is available
     if config.pluginmanager.hasplugin("xdist"):
-        config.pluginmanager.register(XDistHooks())
+        config.pluginmanager.register(XDistHooks(config))
 
 
 class XDistHooks:
     """Container for xdist-specific hooks that are conditionally registered"""
 
-    def pytest_configure_node(self, node):
-        """xdist hook - send configuration to workers"""
-        # Send file hashes to workers so they can track changes
-        # node.config.stash should always exist in modern pytest
-        if file_hashes_key in node.config.stash:
-            # Convert Path keys to strings for serialization
-            file_hashes = node.config.stash[file_hashes_key]
-            serializable_hashes = {
-                str(path): hash_val for path, hash_val in file_hashes.items()
-            }
-            node.slaveinput[XDIST_FILE_HASHES_KEY] = serializable_hashes
-
-    def pytest_testnodedown(self, node, error):
-        """xdist hook - collect file changes from finished workers"""
-        # workeroutput may not exist if the worker crashed or didn't report back
-        worker_output = getattr(node, "workeroutput", {})
-        if XDIST_FILE_CHANGES_KEY in worker_output:
-            # node.session is not guaranteed to exist, so use config.stash directly
-            master_changes = node.config.stash.setdefault(file_changes_key, {})
-
-            for path_str, serialized_changes in worker_output[
-                XDIST_FILE_CHANGES_KEY
-            ].items():
-                path = Path(path_str)
-                # Deserialize and add all changes
-                for change_dict in serialized_changes:
-                    change = Change.from_dict(change_dict)
-                    master_changes.setdefault(path, []).append(change)
+    def __init__(self, config):
+        self.config = config
+
+    def pytest_xdist_node_collection_finished(self, node, ids):
+        """xdist hook - fingerprint the files a worker collected tests from"""
+        # The controller doesn't collect, but it's what writes the changes, so it
+        # fingerprints the files here rather than every worker doing so. Each
+        # worker collects the same files, so only the first to finish adds any.
+        session = node.config.stash[session_ref_key]
+        file_fingerprints = session.stash.setdefault(file_fingerprints_key, {})
+        # A node ID is relative to the rootdir, or, for a file outside it, to the
+        # argument it was collected from, so look for each file under all of them
+        config = node.config
+        bases = [config.rootpath] + [
+            config.invocation_params.dir / arg.split("::", 1)[0] for arg in config.args
+        ]
+        for relative in {nodeid.split("::", 1)[0] for nodeid in ids}:
+            for base in bases:
+                path = Path(os.path.normpath(base / relative))
+                if path not in file_fingerprints and path.is_file():
+                    track_file(path, session)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_logreport(self, report):
+        """Send changes from workers to the controller with each test report"""
+        session = self.config.stash[session_ref_key]
+
+        if hasattr(self.config, "workerinput"):
+            # We're a worker. Attach the changes recorded since the last report,
+            # before xdist serializes it, so a worker that crashes later keeps
+            # them and holds only one test's changes at a time.
+            file_changes = session.stash.get(file_changes_key, None)
+            if file_changes:
+                setattr(report, XDIST_FILE_CHANGES_KEY, file_changes.to_dict())
+                file_changes.clear()
+            return
+
+        # We're the controller. Merge the changes, and remove them from the
+        # report before other plugins see it.
+        serialized_changes = report.__dict__.pop(XDIST_FILE_CHANGES_KEY, None)
+        if serialized_changes:
+            session.stash.setdefault(file_changes_key, ChangeStore()).add_from_dict(
+                serialized_changes
+            )
 
 
 def pytest_sessionfinish(session, exitstatus):
@@ -373,74 +585,198 @@ def pytest_sessionfinish(session, exitstatus):
 
     accept_copy = session.config.getoption("--accept-copy")
 
-    # This hook runs on both master and workers
-    # Check if we're a worker by looking for workeroutput (only exists on workers)
-    if hasattr(session.config, "workeroutput"):
-        # We're a worker - collect all changes and send to master
-        file_changes = session.stash.get(file_changes_key, {})
-        if file_changes:
-            # Convert Path objects to strings and serialize Change objects
-            serializable_changes = {}
-            for path, changes in file_changes.items():
-                serializable_changes[str(path)] = [
-                    change.to_dict() for change in changes
-                ]
-            session.config.workeroutput[XDIST_FILE_CHANGES_KEY] = serializable_changes
+    # This hook runs on both master and workers. Workers send their changes
+    # with each test report, so only the master writes them.
+    if hasattr(session.config, "workerinput"):
         return
 
-    # We're the master (or running without xdist) - write all changes
-    # Check both stashes - xdist stores in config.stash, non-xdist in session.stash
-    file_changes = session.stash.get(file_changes_key, {}) or session.config.stash.get(
-        file_changes_key, {}
-    )
+    file_changes = session.stash.get(file_changes_key, None)
     if not file_changes:
         return
 
-    for path_key, changes in file_changes.items():
-        # Convert back to Path if needed (from xdist serialization)
-        path = Path(path_key) if isinstance(path_key, str) else path_key
-
-        # Check if the file has changed since the start of the test
-        if not accept_copy and has_file_changed(path, session):
-            logger.warning(
-                f"File changed since start of test, not writing results: {path}"
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    # Files are written concurrently, but reported in a consistent order
+    paths = sorted(file_changes.paths())
+    durability = session.config.getoption("--accept-durability")
+    transaction = session.config.getoption("--accept-transaction")
+    batch = None
+    if durability == "batch" or transaction:
+        batch = BatchWriter(sync=durability != "none")
+        write = batch.write
+    else:
+        write = partial(atomic_write, durability=durability)
+
+    executor = ThreadPoolExecutor(max_workers=session.config.getoption("--accept-jobs"))
+    futures = []
+    try:
+        for path in paths:
+            futures.append(
+                executor.submit(
+                    _accept_file,
+                    session,
+                    path,
+                    file_changes,
+                    accept_copy,
+                    write,
+                    transaction,
+                )
             )
+        wait(futures)
+    except BaseException:
+        # Don't start the files still queued, e.g. after Ctrl-C, nor keep those
+        # waiting to be committed
+        executor.shutdown(cancel_futures=True)
+        if batch is not None:
+            batch.discard()
+        raise
+    executor.shutdown()
+
+    errors = []
+    counts = session.config.stash.setdefault(write_counts_key, Counter())
+    for path, future in zip(paths, futures):
+        try:
+            messages, outcome = future.result()
+        except _FileChangedError as error:
+            logger.warning(str(error))
+            errors.append(error)
             continue
+        except Exception as error:
+            logger.warning(f"pytest-accept: Couldn't write {path}: {error}")
+            errors.append(error)
+            continue
+        for message in messages:
+            logger.warning(message)
+        if outcome is not None:
+            counts[outcome] += 1
+
+    if transaction:
+        assert batch is not None
+        if not _commit_transaction(batch, errors):
+            _fail_session(session)
+        return
+    if batch is not None:
+        for target_path, error in batch.commit():
+            logger.warning(f"pytest-accept: Couldn't write {target_path}: {error}")
+            errors.append(error)
+
+    if errors:
+        _fail_session(session)
+
+
+def _fail_session(session: pytest.Session) -> None:
+    """
+    Fail the run once files couldn't be written. The failures have already been
+    reported, so they aren't raised, which would report them again as a bug in
+    the plugin.
+    """
+    if session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def _commit_transaction(batch: BatchWriter, errors: list[Exception]) -> bool:
+    """
+    Write every file, or, if any couldn't be written, none. Returns whether the
+    files were written.
+    """
+    if errors:
+        batch.discard()
+        logger.warning("pytest-accept: Not writing any files, since some couldn't be")
+        return False
+    count = len(batch)
+    try:
+        batch.commit_all()
+    except Exception as error:
+        logger.warning(
+            f"pytest-accept: Rolled back all {count} files, since one couldn't be "
+            f"written: {error}"
+        )
+        return False
+    logger.info(f"pytest-accept: Wrote {count} files in one transaction")
+    return True
+
+
+class _FileChangedError(Exception):
+    """A file changed during the run, so its changes can't be written"""
+
+
+def _accept_file(
+    session,
+    path: Path,
+    file_changes: ChangeStore,
+    accept_copy: bool,
+    write: Callable[..., None],
+    transaction: bool = False,
+) -> tuple[list[str], str | None]:
+    """
+    Write the changes to one file with `write`, which has the signature of
+    `atomic_write`. Returns warnings rather than logging them, since it runs
+    alongside other files, and whether the file was "written" or "unchanged".
+
+    In a transaction, a file that can't be written raises, so no file is.
+    """
+    messages = [
+        f"pytest-accept: Not accepting {path}:{conflict.lineno}, which got different "
+        f"values in different runs (e.g. from a loop or parametrized test)"
+        for conflict in file_changes.conflicts(path)
+    ]
+    changes = file_changes.changes(path)
+    if not changes:
+        return messages, None
+
+    # Determine target path
+    target_path = get_target_path(path, accept_copy)
+
+    # In --accept-copy mode, build on an existing .new file if there is one.
+    # The file is read once, both to check it and to patch it.
+    source_path = target_path if accept_copy and target_path.exists() else path
+    try:
+        original = source_path.read_bytes()
+    except OSError:
+        original = None
+
+    # Check if the file has changed since the start of the test
+    if original is None or (
+        not accept_copy and has_file_changed(path, session, original)
+    ):
+        message = f"File changed since start of test, not writing results: {path}"
+        if transaction:
+            raise _FileChangedError(message)
+        messages.append(message)
+        return messages, None
+
+    pieces, rejected = _apply_changes(original, changes)
+    messages += [
+        f"pytest-accept: Not accepting {path}:{change.lineno}, which overlaps "
+        f"another change"
+        for change in rejected
+    ]
 
-        # Sort changes by priority (assert=1, doctest=2)
-        changes = sorted(changes, key=lambda x: x.priority)
-
-        # Group changes by type for processing
-        assert_changes = [c for c in changes if isinstance(c, AssertChange)]
-        doctest_changes = [c for c in changes if isinstance(c, DoctestChange)]
-
-        # Determine target path
-        target_path = get_target_path(path, accept_copy)
-
-        # Apply all changes in one atomic write
-        def write_unified_content(file):
-            # Start with original file content
-            if accept_copy and target_path.exists():
-                # In --accept-copy mode, use existing .new file if it exists
-                source_path = target_path
-            else:
-                source_path = path
-
-            original = list(source_path.read_text(encoding="utf-8").splitlines())
+    # Leave a file the changes don't alter untouched, rather than updating its
+    # mtime, which would invalidate caches and wake file watchers
+    if sum(len(piece) for piece in pieces) == len(original) and (
+        b"".join(pieces) == original
+    ):
+        return messages, "unchanged"
 
-            # Apply assert changes first
-            if assert_changes:
-                original = _apply_assert_changes(original, assert_changes)
+    # Apply all changes in one atomic write
+    def write_unified_content(file):
+        file.writelines(pieces)
 
-            # Apply doctest changes second
-            if doctest_changes:
-                original = _apply_doctest_changes(original, doctest_changes)
+    write(target_path, write_unified_content, encoding=None)
+    return messages, "written"
 
-            # Write final result
-            for line in original:
-                print(line, file=file)
 
-        atomic_write(target_path, write_unified_content)
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report how many files were written, and how many were left unchanged"""
+    counts = config.stash.get(write_counts_key, None)
+    if not counts:
+        return
+    written, unchanged = counts["written"], counts["unchanged"]
+    summary = f"pytest-accept: wrote {written} file{'' if written == 1 else 's'}"
+    if unchanged:
+        summary += f", left {unchanged} unchanged"
+    terminalreporter.write_line(summary)
 
 
 # ===== Exports =====
@@ -449,12 +785,9 @@ __all__ = [
     "Change",
     "AssertChange",
     "DoctestChange",
-    "pytest_runtest_makereport",
+    "ChangeStore",
     "pytest_sessionfinish",
-    "pytest_sessionstart",
+    "pytest_terminal_summary",
     "pytest_addoption",
     "pytest_configure",
-    "pytest_collect_file",
-    "pytest_assertrepr_compare",
-    "pytest_collection_modifyitems",
 ]
@@ -72,179 +72,282 @@ index c704339..697e266 100644
 import ast
 import copy
 import logging
-import sys
 from pathlib import Path
+from typing import Any
 
-from _pytest._code.code import ExceptionInfo
+import pytest
 
 from . import (
     AssertChange,
+    ChangeStore,
+    __version__,
     file_changes_key,
-    recent_failure_key,
+    rewriter_patched_key,
     session_ref_key,
 )
-from .common import is_accept_mode, track_file_hash
+from .common import is_accept_mode
 
 # Logger
 logger = logging.getLogger(__name__)
 
 # ===== Constants =====
+# Called with the module's `__file__`, the site of the expected value, and the
+# observed value
 _ASSERTION_HANDLER = ast.parse(
-    """
-__import__("pytest_accept").assert_plugin.__handle_failed_assertion()
-"""
+    '__import__("pytest_accept").assert_plugin.__handle_failed_assertion',
+    mode="eval",
 ).body
 
+# Holds the left operand of an assert we could accept. Like pytest's own
+# temporaries, it isn't a valid identifier, so can't clash with the test's names.
+_LEFT_NAME = "@py_accept_left"
+
+# The test item currently running, so the assertion handler can find its session
+# without walking the stack. Bound by `pytest_runtest_protocol`.
+_current_item = None
+
+# The number of configs with an accept session that needs the assertion rewriter
+# patched. In-process sessions can nest (e.g. pytester's `runpytest`), so the
+# patch is applied by the first and removed by the last.
+_patch_users = 0
+# What the patch replaced, to restore when it's removed
+_original_visit_assert = None
+_original_pyc_tail = None
+
 
 # ===== Private Functions =====
+def _acceptable_site(assert_: ast.Assert) -> tuple[int, int, int, int] | None:
+    """
+    Return the location of the expected value of an assert we could accept.
+
+    That's an assert without a message, comparing with a single `==` against a
+    literal. The location is `(lineno, col_offset, end_lineno, end_col_offset)`
+    of the literal, as in the AST. Returns None for any other assert.
+    """
+    test = assert_.test
+    if assert_.msg is not None or not isinstance(test, ast.Compare):
+        return None
+    if len(test.ops) != 1 or not isinstance(test.ops[0], ast.Eq):
+        return None
+
+    comparator = test.comparators[0]
+    try:
+        ast.literal_eval(comparator)
+    except Exception:
+        return None
+
+    assert comparator.end_lineno is not None
+    assert comparator.end_col_offset is not None
+    return (
+        comparator.lineno,
+        comparator.col_offset,
+        comparator.end_lineno,
+        comparator.end_col_offset,
+    )
+
+
+def _locate_new_nodes(node: ast.AST, source: ast.AST) -> None:
+    """
+    Give `node` and the nodes beneath it the location of `source`, stopping at
+    nodes that already have a location.
+    """
+    if getattr(node, "lineno", None) is not None:
+        return
+    if "lineno" in node._attributes:
+        ast.copy_location(node, source)
+    for child in ast.iter_child_nodes(node):
+        _locate_new_nodes(child, source)
+
+
 def _patch_assertion_rewriter():
     # I'm so sorry.
-    # This monkey-patches pytest's private assertion rewriter to wrap all assertions in try-except blocks.
+    # This monkey-patches pytest's private assertion rewriter to record the
+    # observed value of failing assertions we could accept.
 
+    from _pytest.assertion import rewrite
     from _pytest.assertion.rewrite import AssertionRewriter
 
-    old_visit_assert = AssertionRewriter.visit_Assert
+    global _patch_users, _original_visit_assert, _original_pyc_tail
+    _patch_users += 1
+    # Only patch once: stacked patches would each rewrite the fallback of the
+    # patch above them
+    if _patch_users > 1:
+        return
+
+    old_visit_assert = _original_visit_assert = AssertionRewriter.visit_Assert
+    _original_pyc_tail = rewrite.PYC_TAIL
+
+    # pytest caches rewritten modules as pycs tagged with its version. Our
+    # rewriting differs, so cache it under our own tag: otherwise an accept run
+    # would load modules rewritten by a normal run, or vice versa.
+    rewrite.PYC_TAIL = f".{rewrite.PYTEST_TAG}-accept-{__version__}{rewrite.PYC_EXT}"
 
     def new_visit_assert(self, assert_):
-        rv = old_visit_assert(self, assert_)
-
-        # Add simple safety check - if there are too many AST nodes, skip wrapping
-        # This prevents "too many statically nested blocks" errors in edge cases
-        total_nodes = sum(1 for _ in ast.walk(ast.Module(body=rv, type_ignores=[])))
-        if total_nodes > 200:  # Higher threshold - only skip for very complex cases
-            # module_path is an internal pytest attribute that may not exist in all versions
-            if hasattr(self, "module_path"):
-                logger.warning(
-                    f"Skipping accept mode for a complex assertion in {self.module_path}. "
-                    f"This assertion will fail normally and won't be auto-corrected. "
-                    f"To fix: simplify the assertion or manually update the expected value."
-                )
-            # Return original without wrapping to avoid "too many nested blocks"
-            return rv
-
-        exception_type = ast.Name(id="AssertionError", ctx=ast.Load())
-        ast.copy_location(exception_type, assert_)
-
-        try_except = ast.Try(
-            body=rv,
-            handlers=[
-                ast.ExceptHandler(
-                    type=exception_type,
-                    name="__pytest_accept_e",
-                    body=_ASSERTION_HANDLER,
-                )
-            ],
-            orelse=[],
-            finalbody=[],
+        # Work out where the expected value is now, so the handler doesn't need to
+        # read the source when the assertion fails. Asserts we could never accept
+        # are left as pytest rewrites them.
+        site = _acceptable_site(assert_)
+        if site is None:
+            return old_visit_assert(self, assert_)
+
+        # Rather than pytest's rewriting, which builds an explanation of both
+        # operands on failure, compare the operands directly and pass the left
+        # to the handler. Roughly:
+        #
+        #     @py_accept_left = <left>
+        #     if not (@py_accept_left == <expected>):
+        #         if not __handle_failed_assertion(__file__, <site>, @py_accept_left):
+        #             assert @py_accept_left == <expected>  # as rewritten by pytest
+        #     @py_accept_left = None
+        #
+        # The site is a tuple of ints, so it's folded into a constant when the
+        # module is compiled, and survives pytest caching the rewritten module.
+        expected = assert_.test.comparators[0]
+        fallback = ast.Assert(
+            test=ast.Compare(
+                left=ast.Name(id=_LEFT_NAME, ctx=ast.Load()),
+                ops=[ast.Eq()],
+                comparators=[copy.deepcopy(expected)],
+            ),
+            msg=None,
         )
-
-        ast.copy_location(try_except, assert_)
-        for node in ast.iter_child_nodes(try_except):
+        ast.copy_location(fallback, assert_)
+        handler = copy.deepcopy(_ASSERTION_HANDLER)
+        for node in ast.walk(handler):
             ast.copy_location(node, assert_)
-
-        return [try_except]
+        handler_call = ast.Call(
+            func=handler,
+            args=[
+                ast.Name(id="__file__", ctx=ast.Load()),
+                ast.Tuple(elts=[ast.Constant(n) for n in site], ctx=ast.Load()),
+                ast.Name(id=_LEFT_NAME, ctx=ast.Load()),
+            ],
+            keywords=[],
+        )
+        statements = [
+            ast.Assign(
+                targets=[ast.Name(id=_LEFT_NAME, ctx=ast.Store())],
+                value=assert_.test.left,
+            ),
+            ast.If(
+                test=ast.UnaryOp(
+                    ast.Not(),
+                    ast.Compare(
+                        left=ast.Name(id=_LEFT_NAME, ctx=ast.Load()),
+                        ops=[ast.Eq()],
+                        comparators=[expected],
+                    ),
+                ),
+                body=[
+                    ast.If(
+                        test=ast.UnaryOp(ast.Not(), handler_call),
+                        body=old_visit_assert(self, fallback),
+                        orelse=[],
+                    )
+                ],
+                orelse=[],
+            ),
+            # Don't keep the value alive in the test's frame
+            ast.Assign(
+                targets=[ast.Name(id=_LEFT_NAME, ctx=ast.Store())],
+                value=ast.Constant(None),
+            ),
+        ]
+
+        # Give the nodes we created the assert's location. The operands and
+        # pytest's rewriting of the fallback are already located, so this
+        # doesn't descend into them: rewriting stays linear in the size of the
+        # module. The generated code adds no loop, `try` or `with` blocks, so
+        # however large the assert, it can't hit CPython's limit on nested
+        # blocks.
+        for statement in statements:
+            _locate_new_nodes(statement, assert_)
+
+        return statements
 
     AssertionRewriter.visit_Assert = new_visit_assert  # type: ignore[method-assign]
 
 
-def __handle_failed_assertion():
-    raw_excinfo = sys.exc_info()
-    if raw_excinfo is None:
+def _unpatch_assertion_rewriter():
+    """Undo `_patch_assertion_rewriter` once no session needs it"""
+    from _pytest.assertion import rewrite
+    from _pytest.assertion.rewrite import AssertionRewriter
+
+    global _patch_users, _original_visit_assert, _original_pyc_tail
+    _patch_users -= 1
+    if _patch_users > 0:
         return
 
-    # Try to get the current test item from the call stack
-    import inspect
-
-    for frame_info in inspect.stack():
-        frame_locals = frame_info.frame.f_locals
-        # Walking up stack frames is inherently uncertain - check if item has session
-        if "item" in frame_locals and hasattr(frame_locals["item"], "session"):
-            session = frame_locals["item"].session
-            recent_failure = session.config.stash.setdefault(recent_failure_key, [])
-            if not recent_failure:
-                continue
-            op, left, _ = recent_failure.pop()
-            if op != "==":
-                logger.debug("does not assert equality, and won't be replaced")
-                continue
-            __handle_failed_assertion_impl(raw_excinfo, session, left)
-            # If we're here, we're in accept mode (otherwise the rewriter wouldn't be patched)
-            return
-
-    # If we couldn't find session, re-raise
-    raise
-
-
-def __handle_failed_assertion_impl(raw_excinfo, session, left):
-    excinfo = ExceptionInfo.from_exc_info(raw_excinfo)
-    tb_entry = excinfo.traceback[0]
-    # not exactly sure why +1, but in tb_entry.__repr__
-    line_number_start = tb_entry.lineno + 1
-    line_number_end = line_number_start + len(tb_entry.statement.lines) - 1
-    original_location = slice(line_number_start, line_number_end)
-
-    path = Path(tb_entry.path)
-    with path.open() as f:
-        tree = ast.parse(f.read())
-
-    for item in ast.walk(tree):
-        if isinstance(item, ast.Assert) and original_location.start == item.lineno:
-            # we need to _then_ check that the next compare item's
-            # ops[0] is Eq and then replace the comparator[0]
-            test = item.test
-            if not isinstance(test, ast.Compare):
-                continue
-            try:
-                assert item.msg is None
-                assert len(test.comparators) == 1
-                assert len(test.ops) == 1
-                assert isinstance(test.ops[0], ast.Eq)
-
-                ast.literal_eval(test.comparators[0])
-            except Exception:
-                continue
-
-            new_assert = copy.copy(item)
-            test.comparators[0] = ast.Constant(value=left)
-
-            # Submit change to unified change collection
-            file_changes = session.stash.setdefault(file_changes_key, {})
-            file_changes.setdefault(path, []).append(
-                AssertChange(
-                    priority=1,  # Assert changes run first
-                    location=original_location,
-                    ast_node=new_assert,
-                )
-            )
+    assert _original_visit_assert is not None and _original_pyc_tail is not None
+    AssertionRewriter.visit_Assert = _original_visit_assert  # type: ignore[method-assign]
+    rewrite.PYC_TAIL = _original_pyc_tail
+    _original_visit_assert = _original_pyc_tail = None
+
+
+def __handle_failed_assertion(
+    file: str, site: tuple[int, int, int, int], left: Any
+) -> bool:
+    """Record the observed value of a failed assert, returning whether we could"""
+    # Outside of a running test (e.g. a module-level assert), there's nowhere to
+    # record the change, so the assert fails as normal
+    if _current_item is None:
+        return False
+
+    # If we're here, we're in accept mode (otherwise the rewriter wouldn't be patched)
+    _record_assert_change(_current_item.session, file, site, left)
+    return True
+
+
+def _record_assert_change(
+    session: pytest.Session, file: str, site: tuple[int, int, int, int], left: Any
+) -> None:
+    """Record replacing the expected value at `site` with the observed value"""
+    lineno, col_offset, end_lineno, end_col_offset = site
+    file_changes = session.stash.setdefault(file_changes_key, ChangeStore())
+    file_changes.add(
+        Path(file),
+        AssertChange(
+            priority=1,  # Assert changes run first
+            location=slice(lineno, end_lineno),
+            columns=(col_offset, end_col_offset),
+            source=repr(left),
+        ),
+    )
 
 
 # ===== Plugin Hooks =====
-def pytest_assertrepr_compare(config, op, left, right):
-    # Store in config stash since session might not be available yet
-    recent_failure = config.stash.setdefault(recent_failure_key, [])
-    recent_failure.append((op, left, right))
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Bind the running item for the assertion handler"""
+    global _current_item
+    # Restore the item of any session this one runs within
+    outer_item, _current_item = _current_item, item
+    try:
+        yield
+    finally:
+        _current_item = outer_item
 
 
 def pytest_sessionstart(session):
     # Store session reference in config for access during assertion handling
     session.config.stash[session_ref_key] = session
 
-    # Patch the assertion rewriter when in accept mode
-    if is_accept_mode(session.config):
+    # Patch the assertion rewriter when in accept mode, unless another engine
+    # intercepts failing asserts
+    if (
+        is_accept_mode(session.config)
+        and session.config.getoption("--accept-engine") == "rewrite"
+    ):
         _patch_assertion_rewriter()
+        session.config.stash[rewriter_patched_key] = True
 
 
-def pytest_collection_modifyitems(session, config, items):
-    """Track file hashes during collection"""
-    if is_accept_mode(session.config):
-        seen_files = set()
-        for item in items:
-            # Different test types (e.g., doctests) may have different attributes
-            if hasattr(item, "fspath") and item.fspath not in seen_files:
-                path = Path(item.fspath)
-                if path.exists():
-                    track_file_hash(path, session)
-                    seen_files.add(item.fspath)
+def pytest_unconfigure(config):
+    # Remove the patch at the end of the session that applied it, so it doesn't
+    # outlive it in this process
+    if config.stash.get(rewriter_patched_key, False):
+        _unpatch_assertion_rewriter()
+        del config.stash[rewriter_patched_key]
 
 
 # Note: pytest_sessionfinish removed - unified writer handles all file operations
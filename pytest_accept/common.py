@@ -2,20 +2,25 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
+import sys
 import tempfile
+import time
 from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from . import file_hashes_key
+from . import file_fingerprints_key
 
 
 def atomic_write(
     target_path: str | Path,
     writer: Callable[[Any], None],
-    encoding: str = "utf-8",
+    encoding: str | None = "utf-8",
     suffix: str | None = None,
+    durability: str = "file",
 ) -> None:
     """
     Atomically write to a file using a temporary file and rename.
@@ -23,10 +28,128 @@ def atomic_write(
     Args:
         target_path: The final destination path
         writer: A function that takes a file object and writes content
-        encoding: Text encoding (default: utf-8)
+        encoding: Text encoding (default: utf-8), or None to write bytes
         suffix: Suffix for temp file (default: uses target file suffix)
+        durability: "file" (default) syncs the file and then its directory, so
+            both the contents and the rename survive a crash. "none" syncs
+            nothing, leaving it to the OS.
     """
     target_path = Path(target_path)
+    temp_path = _write_temp(
+        target_path, writer, encoding, suffix, sync=durability != "none"
+    )
+    try:
+        # Atomic rename
+        os.replace(temp_path, target_path)
+    except Exception:
+        _remove(temp_path)
+        raise
+    if durability == "file":
+        fsync_directory(target_path.parent)
+
+
+class BatchWriter:
+    """
+    Atomically write many files, syncing them as a batch.
+
+    Every file is written to a temporary file and synced before any is renamed
+    into place, and then each directory is synced once, rather than once per
+    file. `write` can be called from several threads at once.
+    """
+
+    def __init__(self, sync: bool = True):
+        self._pending: list[tuple[Path, Path]] = []
+        self._sync = sync
+
+    def write(
+        self,
+        target_path: str | Path,
+        writer: Callable[[Any], None],
+        encoding: str | None = "utf-8",
+        suffix: str | None = None,
+    ) -> None:
+        target_path = Path(target_path)
+        temp_path = _write_temp(target_path, writer, encoding, suffix, self._sync)
+        self._pending.append((target_path, temp_path))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def commit(self) -> list[tuple[Path, Exception]]:
+        """
+        Rename the written files into place, in path order, and sync their
+        directories. Returns the files that couldn't be renamed, and why.
+        """
+        errors = []
+        directories = set()
+        for target_path, temp_path in sorted(self._pending):
+            try:
+                os.replace(temp_path, target_path)
+            except OSError as error:
+                _remove(temp_path)
+                errors.append((target_path, error))
+                continue
+            directories.add(target_path.parent)
+        self._pending.clear()
+
+        self._sync_directories(directories)
+        return errors
+
+    def commit_all(self) -> None:
+        """
+        Rename every written file into place, or none of them.
+
+        Each file being replaced is first kept as a hard link, so if any rename
+        fails, or is interrupted, those already made are undone by renaming
+        the originals back.
+        """
+        pending = sorted(self._pending)
+        self._pending.clear()
+        backups: dict[Path, Path] = {}
+        committed: list[Path] = []
+        try:
+            for target_path, _ in pending:
+                if target_path.exists():
+                    backups[target_path] = _backup(target_path)
+            for target_path, temp_path in pending:
+                os.replace(temp_path, target_path)
+                committed.append(target_path)
+        except BaseException:
+            for target_path in reversed(committed):
+                if target_path in backups:
+                    os.replace(backups.pop(target_path), target_path)
+                else:
+                    _remove(target_path)
+            for backup_path in backups.values():
+                _remove(backup_path)
+            for _, temp_path in pending[len(committed) :]:
+                _remove(temp_path)
+            raise
+
+        for backup_path in backups.values():
+            _remove(backup_path)
+        self._sync_directories({target_path.parent for target_path in committed})
+
+    def discard(self) -> None:
+        """Remove the written files without renaming any into place"""
+        for _, temp_path in self._pending:
+            _remove(temp_path)
+        self._pending.clear()
+
+    def _sync_directories(self, directories: set[Path]) -> None:
+        if self._sync:
+            for directory in sorted(directories):
+                fsync_directory(directory)
+
+
+def _write_temp(
+    target_path: Path,
+    writer: Callable[[Any], None],
+    encoding: str | None,
+    suffix: str | None,
+    sync: bool,
+) -> Path:
+    """Write to a temporary file next to `target_path`, returning its path"""
     if suffix is None:
         suffix = target_path.suffix
 
@@ -34,22 +157,54 @@ def atomic_write(
         dir=target_path.parent, prefix=".tmp_", suffix=suffix
     )
     try:
-        with os.fdopen(temp_fd, "w", encoding=encoding) as file:
+        mode = "wb" if encoding is None else "w"
+        with os.fdopen(temp_fd, mode, encoding=encoding) as file:
             writer(file)
-            # Ensure file is written to disk before rename
-            file.flush()
-            os.fsync(file.fileno())
-
-        # Atomic rename
-        os.replace(temp_path, target_path)
-
+            if sync:
+                # Ensure file is written to disk before rename
+                file.flush()
+                os.fsync(file.fileno())
     except Exception:
         # Clean up temp file on error
-        try:
-            os.unlink(temp_path)
-        except OSError:
-            pass
+        _remove(Path(temp_path))
         raise
+    return Path(temp_path)
+
+
+def _backup(path: Path) -> Path:
+    """Keep the current version of a file under a temporary name next to it"""
+    import secrets
+    import shutil
+
+    backup_path = path.with_name(f".tmp_{secrets.token_hex(8)}_{path.name}")
+    try:
+        # A hard link costs no copying, and keeps the original's metadata
+        os.link(path, backup_path)
+    except OSError:
+        shutil.copy2(path, backup_path)
+    return backup_path
+
+
+def _remove(path: Path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def fsync_directory(path: Path) -> None:
+    """Sync a directory, so the renames into it survive a crash"""
+    # Windows can't open a directory to sync it
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Some filesystems don't support syncing a directory
+        pass
+    finally:
+        os.close(fd)
 
 
 def get_target_path(
@@ -70,21 +225,105 @@ def get_target_path(
     return source_path
 
 
-def track_file_hash(path: Path, session) -> None:
-    """Store the hash of a file to detect later changes."""
-    file_hashes = session.stash.setdefault(file_hashes_key, {})
-    file_hashes[path] = hash(path.read_bytes())
+@dataclass
+class Fingerprint:
+    """What a file looked like when it was collected, to detect later changes"""
+
+    mtime_ns: int
+    size: int
+    ino: int
+    # A digest of the contents, taken only when the stat alone can't show the file
+    # is unchanged
+    digest: str | None = None
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        return (self.mtime_ns, self.size, self.ino) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+            stat.st_ino,
+        )
+
+
+# A file modified this recently when it's fingerprinted could be modified again
+# without its mtime changing, given the timestamp resolution of some
+# filesystems. So for those, the fingerprint includes a digest of the contents.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+# Read in chunks, so digesting a large file takes constant memory
+_DIGEST_CHUNK_SIZE = 1 << 20
+
+
+def _digest(path: Path) -> str:
+    """
+    Return a digest of a file's contents.
+
+    Unlike `hash`, it's the same in every process, so it can be shared with xdist
+    workers and kept between sessions.
+    """
+    with open(path, "rb") as file:
+        if sys.version_info >= (3, 11):
+            return hashlib.file_digest(file, _new_digest).hexdigest()
+        digest = _new_digest()
+        while chunk := file.read(_DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
+
 
+def _new_digest():
+    return hashlib.blake2b(digest_size=32)
 
-def has_file_changed(path: Path, session) -> bool:
-    """Check if a file has changed since it was tracked."""
-    file_hashes = session.stash.setdefault(file_hashes_key, {})
 
-    if path not in file_hashes:
+def _fingerprint_key(path: Path) -> Path:
+    """
+    Key fingerprints by the normalized path, so a file reached through `..`, as a
+    node ID outside the rootdir is, matches the path its changes are recorded with.
+    """
+    return Path(os.path.normpath(path))
+
+
+def track_file(path: Path, session) -> None:
+    """Fingerprint a file to detect later changes, usually with a single `stat`."""
+    stat = path.stat()
+    digest = None
+    if time.time_ns() - stat.st_mtime_ns < _RACY_WINDOW_NS:
+        digest = _digest(path)
+    file_fingerprints = session.stash.setdefault(file_fingerprints_key, {})
+    file_fingerprints[_fingerprint_key(path)] = Fingerprint(
+        stat.st_mtime_ns, stat.st_size, stat.st_ino, digest
+    )
+
+
+def has_file_changed(path: Path, session, content: bytes | None = None) -> bool:
+    """
+    Check if a file has changed since it was tracked.
+
+    Pass `content` if the file's already been read, so it isn't read again. Read
+    it before checking, so a change made after it was read is still detected.
+    """
+    file_fingerprints = session.stash.setdefault(file_fingerprints_key, {})
+
+    key = _fingerprint_key(path)
+    if key not in file_fingerprints:
         return True  # Unknown file, assume changed for safety
+    fingerprint = file_fingerprints[key]
 
-    current_hash = hash(path.read_bytes())
-    return current_hash != file_hashes[path]
+    # Where we have a digest, it's conclusive; otherwise the stat is, since the
+    # file wasn't recently modified when we fingerprinted it
+    if fingerprint.digest is not None:
+        if content is not None:
+            digest = _new_digest()
+            digest.update(content)
+            return digest.hexdigest() != fingerprint.digest
+        try:
+            return _digest(path) != fingerprint.digest
+        except OSError:
+            return True
+    try:
+        stat = path.stat()
+    except OSError:
+        return True
+    return not fingerprint.matches_stat(stat)
 
 
 def is_accept_mode(config) -> bool:
@@ -7,10 +7,11 @@ from pathlib import Path
 
 import pytest
 from _pytest.doctest import DoctestItem, MultipleDoctestFailures
+from _pytest.pathlib import fnmatch_ex
 
-from . import DoctestChange, file_changes_key
+from . import ChangeStore, DoctestChange, file_changes_key
 from .common import (
-    track_file_hash,
+    track_file,
 )
 
 logger = logging.getLogger(__name__)
@@ -19,11 +20,32 @@ logger = logging.getLogger(__name__)
 # This provides proper isolation between test sessions and better testability
 
 
+def _can_receive_changes(file_path: Path, parent) -> bool:
+    """
+    Whether a file could get an assert or doctest change, judged from its path so
+    we don't read files we'd never write, like data files alongside tests.
+
+    That's Python modules, and text files pytest collects doctests from, by the
+    same rules as `_pytest.doctest`.
+    """
+    if file_path.suffix == ".py":
+        return True
+    if file_path.suffix in (".txt", ".rst") and parent.session.isinitpath(file_path):
+        return True
+    globs = parent.config.getoption("doctestglob") or ["test*.txt"]
+    return any(fnmatch_ex(glob, file_path) for glob in globs)
+
+
 def pytest_collect_file(file_path, parent):
     """
-    Store the hash of the file so we can check if it changed later
+    Fingerprint the file so we can check if it changed later
     """
-    track_file_hash(file_path, parent.session)
+    # Under xdist, only the controller writes changes, so it fingerprints files
+    # itself, from the tests each worker collects
+    if hasattr(parent.config, "workerinput"):
+        return
+    if _can_receive_changes(file_path, parent):
+        track_file(file_path, parent.session)
 
 
 @pytest.hookimpl(hookwrapper=True, tryfirst=True)
@@ -35,29 +57,19 @@ def pytest_runtest_makereport(item, call):
         return
 
     # Submit failures to unified change collection
-    file_changes = item.session.stash.setdefault(file_changes_key, {})
+    file_changes = item.session.stash.setdefault(file_changes_key, ChangeStore())
 
     if isinstance(call.excinfo.value, DocTestFailure):
         failure = call.excinfo.value
         path = Path(failure.test.filename)
-        file_changes.setdefault(path, []).append(
-            DoctestChange(
-                priority=2,  # Doctest changes run after assert changes
-                failure=failure,
-            )
-        )
+        file_changes.add(path, DoctestChange.from_failure(failure))
 
     elif isinstance(call.excinfo.value, MultipleDoctestFailures):
         for failure in call.excinfo.value.failures:
             # Don't include tests that fail because of an error setting the test.
             if isinstance(failure, DocTestFailure):
                 path = Path(failure.test.filename)
-                file_changes.setdefault(path, []).append(
-                    DoctestChange(
-                        priority=2,  # Doctest changes run after assert changes
-                        failure=failure,
-                    )
-                )
+                file_changes.add(path, DoctestChange.from_failure(failure))
 
     return outcome.get_result()
 
@@ -71,25 +83,8 @@ def _snapshot_start_line(failure: DocTestFailure) -> int:
     )
 
 
-def pytest_addoption(parser):
-    """Add pytest-accept options to pytest"""
-    group = parser.getgroup("accept", "accept test plugin")
-    group.addoption(
-        "--accept",
-        action="store_true",
-        default=False,
-        help="Accept the output of doctests, overwriting python files with generated results.",
-    )
-    group.addoption(
-        "--accept-copy",
-        action="store_true",
-        default=False,
-        help="Write a copy of python file named `.py.new` with the generated results of doctests.",
-    )
-
-
 def pytest_configure(config):
-    """Sets doctests to continue after first failure"""
+    """Sets doctests to continue after first failure, so we see every failure"""
     config.option.doctest_continue_on_failure = True
 
 
@@ -0,0 +1,139 @@
+"""
+An engine for accepting asserts built on `sys.monitoring` (PEP 669, Python 3.12+).
+
+Selected with `--accept-engine=monitoring`. Rather than changing how pytest
+rewrites asserts, it listens for `AssertionError`s as they're raised, so passing
+asserts run exactly the bytecode they would without the plugin. The observed
+value comes from pytest's own comparison explanation, which it builds just
+before raising.
+
+Because the assert has already raised, the test stops there: only the first
+failing assert in each test is accepted per run, and the test is still
+reported as failing.
+"""
+
+from __future__ import annotations
+
+import ast
+import logging
+import sys
+from itertools import islice
+from pathlib import Path
+from types import CodeType
+from typing import Any
+
+import pytest
+
+from .assert_plugin import _acceptable_site, _record_assert_change
+
+# Logger
+logger = logging.getLogger(__name__)
+
+# sys.monitoring reserves ids 0-2 and 5 for debuggers, coverage, profilers and
+# optimizers; 3 and 4 are free for anything else
+_TOOL_IDS = (3, 4)
+_TOOL_NAME = "pytest-accept"
+
+
+def _assert_sites(filename: str) -> dict[tuple[int, int], tuple[int, int, int, int]]:
+    """
+    Map each acceptable assert in a file, by `(lineno, col_offset)` of the assert
+    statement, to the location of its expected value.
+    """
+    try:
+        tree = ast.parse(Path(filename).read_bytes(), filename=filename)
+    except (OSError, SyntaxError, ValueError):
+        return {}
+
+    sites = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assert):
+            site = _acceptable_site(node)
+            if site is not None:
+                sites[(node.lineno, node.col_offset)] = site
+    return sites
+
+
+class MonitoringEngine:
+    """Hooks for `--accept-engine=monitoring`, registered only when it's selected"""
+
+    def __init__(self):
+        self._tool_id: int | None = None
+        # The left operand of the last failed comparison pytest explained, until
+        # the assert it belongs to raises
+        self._comparison: tuple[str, Any] | None = None
+        # The assertion error from an acceptable assert in the running test,
+        # with the file, site and observed value to record if it fails the test
+        self._raised: tuple[BaseException, str, tuple, Any] | None = None
+        # Acceptable sites by file; only files with a failing assert are parsed
+        self._sites: dict[str, dict] = {}
+
+    def _on_raise(self, code: CodeType, instruction_offset: int, exception):
+        # Called for every exception raised anywhere, and again in each frame it
+        # propagates through, so bail out as cheaply as possible
+        if self._comparison is None or type(exception) is not AssertionError:
+            return
+        op, left = self._comparison
+        self._comparison = None
+        if op != "==":
+            return
+
+        # pytest gives the `raise` of a rewritten assert the assert's location.
+        # (This only runs on 3.12+, but checking the version here would cost
+        # every exception a little.)
+        positions = code.co_positions()  # ty: ignore[unresolved-attribute]
+        position = next(islice(positions, instruction_offset // 2, None))
+        lineno, _, col_offset, _ = position
+        filename = code.co_filename
+        if filename not in self._sites:
+            self._sites[filename] = _assert_sites(filename)
+        site = self._sites[filename].get((lineno, col_offset))
+        if site is not None:
+            self._raised = (exception, filename, site, left)
+
+    def pytest_sessionstart(self, session):
+        # `pytest_configure` only registers the engine on 3.12+
+        if sys.version_info < (3, 12):
+            return
+        monitoring = sys.monitoring
+        for tool_id in _TOOL_IDS:
+            if monitoring.get_tool(tool_id) is None:
+                break
+        else:
+            logger.warning(
+                "pytest-accept: No free sys.monitoring tool id, so failing asserts "
+                "won't be accepted. Try --accept-engine=rewrite."
+            )
+            return
+
+        monitoring.use_tool_id(tool_id, _TOOL_NAME)
+        monitoring.register_callback(tool_id, monitoring.events.RAISE, self._on_raise)
+        monitoring.set_events(tool_id, monitoring.events.RAISE)
+        self._tool_id = tool_id
+
+    def pytest_sessionfinish(self, session):
+        if self._tool_id is None or sys.version_info < (3, 12):
+            return
+        monitoring = sys.monitoring
+        monitoring.set_events(self._tool_id, monitoring.events.NO_EVENTS)
+        monitoring.register_callback(self._tool_id, monitoring.events.RAISE, None)
+        monitoring.free_tool_id(self._tool_id)
+        self._tool_id = None
+        self._sites.clear()
+
+    def pytest_assertrepr_compare(self, config, op, left, right):
+        # Only observe the comparison; pytest builds the explanation as usual
+        self._comparison = (op, left)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        yield
+        raised, self._raised = self._raised, None
+        self._comparison = None
+        # Only accept the assert if it's what failed the test; one caught by the
+        # test (e.g. with `pytest.raises`) raises but doesn't fail
+        if raised is None or call.excinfo is None:
+            return
+        exception, filename, site, left = raised
+        if call.excinfo.value is exception:
+            _record_assert_change(item.session, filename, site, left)
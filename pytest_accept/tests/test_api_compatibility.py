@@ -92,7 +92,8 @@ def test_another():
     assert new_file.exists()
     content = new_file.read_text()
     assert "assert 1 == 1" in content
-    assert "assert 'hello' == 'hello'" in content  # AST rewriting normalizes quotes
+    # Only the expected value is replaced, so the rest keeps its quotes
+    assert """assert "hello" == 'hello'""" in content
 
 
 def test_passing_tests_work_without_apis(pytester, caplog):
@@ -165,10 +166,10 @@ def test_warning_message_format(pytester, monkeypatch):
     source = inspect.getsource(pytest_configure)
 
     # Verify it contains our API checking logic
-    assert "from _pytest._code.code import ExceptionInfo" in source
     assert "from _pytest.assertion.rewrite import AssertionRewriter" in source
     assert "from _pytest.doctest import DoctestItem, MultipleDoctestFailures" in source
     assert "AssertionRewriter.visit_Assert not found" in source
-    assert "ExceptionInfo.from_exc_info not found" in source
+    # Failure locations come from the rewritten assert, not pytest's tracebacks
+    assert "ExceptionInfo" not in source
     assert "config.option.accept = False" in source
     assert "config.option.accept_copy = False" in source
@@ -8,7 +8,7 @@ def test_basic(pytester):
     result.assert_outcomes(passed=1)
 
     with open(str(path) + ".new") as f:
-        assert f.read() == test_contents.replace("1 == 3", "1 == 1")
+        assert f.read() == test_contents.replace("1 == 3", "1 == 1").rstrip()
 
 
 def test_neq(pytester):
@@ -38,7 +38,8 @@ def test_too_complex(pytester):
     test_contents = "import random\ndef test_x():\n    assert 10 == random.random()\n"
     path = pytester.makepyfile(test_contents)
     result = pytester.runpytest("--accept-copy")
-    result.assert_outcomes(passed=1)
+    # The expected value isn't a literal, so the assert is left to fail as normal
+    result.assert_outcomes(failed=1)
 
     assert not os.path.exists(str(path) + ".new")
 
@@ -51,6 +52,168 @@ def test_multiple_asserts(pytester):
     result.assert_outcomes(passed=1)
 
     with open(str(path) + ".new") as f:
-        assert f.read() == test_contents.replace("1 == 3", "1 == 1").replace(
-            "2 == 3", "2 == 2"
+        assert (
+            f.read()
+            == test_contents.replace("1 == 3", "1 == 1")
+            .replace("2 == 3", "2 == 2")
+            .rstrip()
+        )
+
+
+def test_deep_stack(pytester, monkeypatch):
+    # The handler looks up the running test directly rather than walking the stack,
+    # so a failure deep in a helper is handled without `inspect`.
+    import inspect
+
+    def _no_stack(*args, **kwargs):
+        raise RuntimeError("inspect.stack shouldn't be called")
+
+    # The session runs in-process, so it sees the patch, which is undone after
+    monkeypatch.setattr(inspect, "stack", _no_stack)
+    test_contents = (
+        "def recurse(n):\n"
+        "    if n:\n"
+        "        return recurse(n - 1)\n"
+        "    assert 1 == 3\n"
+        "\n"
+        "def test_x():\n"
+        "    recurse(200)\n"
+    )
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy")
+    result.assert_outcomes(passed=1)
+
+    with open(str(path) + ".new") as f:
+        assert f.read() == test_contents.replace("1 == 3", "1 == 1").rstrip()
+
+
+def test_replaces_only_expected_value(pytester):
+    test_contents = (
+        "def test_x():\n"
+        '    assert "héllo" + "!" == "wörld"  # a comment\n'
+        "    assert [1,\n"
+        "            2] == [\n"
+        "        3,\n"
+        "    ]\n"
+    )
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy")
+    result.assert_outcomes(passed=1)
+
+    with open(str(path) + ".new", encoding="utf-8") as f:
+        assert f.read() == (
+            "def test_x():\n"
+            """    assert "héllo" + "!" == 'héllo!'  # a comment\n"""
+            "    assert [1,\n"
+            "            2] == [1, 2]"
         )
+
+
+def test_separate_pyc_cache(pytester, monkeypatch):
+    # Accept runs cache rewritten modules separately from normal runs, so neither
+    # loads the other's rewritten asserts
+    monkeypatch.delenv("PYTHONDONTWRITEBYTECODE", raising=False)
+    test_contents = "def test_x():\n    assert 1 == 3\n"
+    path = pytester.makepyfile(test_contents)
+
+    pytester.runpytest_subprocess().assert_outcomes(failed=1)
+    pytester.runpytest_subprocess("--accept-copy").assert_outcomes(passed=1)
+    pytester.runpytest_subprocess().assert_outcomes(failed=1)
+    assert len(list((pytester.path / "__pycache__").glob("*.pyc"))) == 2
+
+    with open(str(path) + ".new") as f:
+        assert f.read() == test_contents.replace("1 == 3", "1 == 1").rstrip()
+
+
+def test_no_explanation_for_accepted(pytester):
+    # pytest's explanation of a failed assert, which reprs both operands, isn't
+    # built for an assert we're accepting; the value is only repr-ed once
+    test_contents = """\
+class Value:
+    reprs = 0
+
+    def __eq__(self, other):
+        return False
+
+    def __repr__(self):
+        Value.reprs += 1
+        return "1"
+
+def test_x():
+    assert Value() == 2
+    assert Value.reprs == 1
+"""
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy")
+    result.assert_outcomes(passed=1)
+
+    with open(str(path) + ".new") as f:
+        assert (
+            f.read() == test_contents.replace("Value() == 2", "Value() == 1").rstrip()
+        )
+
+
+def test_module_level_assert_fails_normally(pytester):
+    # Outside a test there's nowhere to record the value, so the assert fails with
+    # pytest's usual explanation
+    pytester.makepyfile("X = 1\nassert X == 2\n\ndef test_x():\n    pass\n")
+    result = pytester.runpytest_subprocess("--accept-copy")
+    result.stdout.fnmatch_lines(["*assert 1 == 2*"])
+    assert result.ret == 2
+
+
+def test_patch_removed_after_session(pytester):
+    from _pytest.assertion import rewrite
+
+    original = (rewrite.AssertionRewriter.visit_Assert, rewrite.PYC_TAIL)
+    pytester.makepyfile("def test_x():\n    assert 1 == 2\n")
+    # Each in-process session patches the rewriter afresh, rather than on top of
+    # the last, and leaves it as it found it
+    for _ in range(3):
+        pytester.runpytest("--accept-copy").assert_outcomes(passed=1)
+        assert (rewrite.AssertionRewriter.visit_Assert, rewrite.PYC_TAIL) == original
+    pytester.runpytest().assert_outcomes(failed=1)
+
+
+def test_nested_session(pytester):
+    test_contents = """\
+def test_x(pytester):
+    pytester.makepyfile(test_inner="def test_y():\\n    assert 1 == 2\\n")
+    pytester.runpytest("--accept-copy").assert_outcomes(passed=1)
+    assert 1 == 3
+"""
+    path = pytester.makepyfile(test_contents)
+    # The inner session ending doesn't stop the outer test's assert being
+    # accepted
+    result = pytester.runpytest_subprocess("-p", "pytester", "--accept-copy")
+    result.assert_outcomes(passed=1)
+
+    with open(str(path) + ".new") as f:
+        assert f.read() == test_contents.replace("1 == 3", "1 == 1").rstrip()
+
+
+def test_unchanged_file_not_rewritten(pytester):
+    # The value's repr is already the expected value, so accepting it leaves the
+    # file as it is, and it isn't rewritten
+    unchanged_contents = """\
+class Value:
+    def __eq__(self, other):
+        return False
+
+    def __repr__(self):
+        return "2"
+
+def test_x():
+    assert Value() == 2"""
+    unchanged = pytester.makepyfile(test_unchanged=unchanged_contents)
+    changed = pytester.makepyfile(test_changed="def test_x():\n    assert 1 == 3")
+    before = unchanged.stat()
+
+    result = pytester.runpytest("--accept")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["pytest-accept: wrote 1 file, left 1 unchanged"])
+
+    after = unchanged.stat()
+    assert (after.st_mtime_ns, after.st_ino) == (before.st_mtime_ns, before.st_ino)
+    assert unchanged.read_text() == unchanged_contents
+    assert changed.read_text() == "def test_x():\n    assert 1 == 1"
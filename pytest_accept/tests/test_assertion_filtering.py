@@ -11,7 +11,8 @@ def test_messages():
     path = pytester.makepyfile(test_contents)
 
     result = pytester.runpytest("--accept-copy")
-    result.assert_outcomes(passed=1)
+    # The assertion with a message fails as normal
+    result.assert_outcomes(failed=1)
 
     # File is created because at least one assertion can be rewritten
     new_path = path.parent / (path.name + ".new")
@@ -81,7 +82,8 @@ def test_nothing_to_rewrite():
     path = pytester.makepyfile(test_contents)
 
     result = pytester.runpytest("--accept-copy")
-    result.assert_outcomes(passed=1)
+    # The assertion with a message fails as normal
+    result.assert_outcomes(failed=1)
 
     # No .new file created because nothing was rewritten
     new_path = path.parent / (path.name + ".new")
@@ -99,7 +101,8 @@ def test_multiple():
     path = pytester.makepyfile(test_contents)
 
     result = pytester.runpytest("--accept-copy")
-    result.assert_outcomes(passed=1)
+    # The chained comparison fails as normal
+    result.assert_outcomes(failed=1)
 
     new_path = path.parent / (path.name + ".new")
     assert new_path.exists()
@@ -111,8 +114,8 @@ def test_multiple():
         assert "assert 1 == 1 == 2" in content  # Multiple unchanged
 
 
-def test_only_first_assertion_on_line_rewritten(pytester):
-    """When multiple assertions on same line, only first is processed"""
+def test_multiple_assertions_on_line_rewritten(pytester):
+    """When multiple assertions are on the same line, each is rewritten"""
     test_contents = """
 def test_same_line():
     assert 1 == 2; assert 3 == 4
@@ -127,7 +130,5 @@ def test_same_line():
 
     with open(new_path) as f:
         content = f.read()
-        # Only the first assertion is fixed, second is lost during AST round-trip
-        assert "assert 1 == 1" in content
-        # The semicolon and second assertion are typically lost in AST processing
-        assert ";" not in content or "assert 3 == 4" not in content
+        # Only the expected values are replaced, so the rest of the line survives
+        assert "assert 1 == 1; assert 3 == 3" in content
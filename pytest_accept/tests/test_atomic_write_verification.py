@@ -5,6 +5,8 @@ import threading
 import time
 from pathlib import Path
 
+import pytest
+
 
 def test_temp_files_created_during_write(pytester, monkeypatch):
     """Verify temp files are created and renamed atomically"""
@@ -163,3 +165,220 @@ def add(a, b):
     pytester.runpytest("--doctest-modules", "--accept-copy")
     # Should have created temp files for doctest too
     assert len(temp_files_seen) > 0, "Doctest plugin should use temp files"
+
+
+def test_files_written_concurrently(pytester, monkeypatch):
+    """Test that files are written by several threads, up to --accept-jobs"""
+    import pytest_accept
+
+    threads = set()
+    original_atomic_write = pytest_accept.atomic_write
+
+    def tracking_atomic_write(*args, **kwargs):
+        threads.add(threading.get_ident())
+        # Hold each thread long enough that the others pick up files too
+        time.sleep(0.05)
+        return original_atomic_write(*args, **kwargs)
+
+    monkeypatch.setattr(pytest_accept, "atomic_write", tracking_atomic_write)
+    pytester.makepyfile(
+        **{f"test_{i}": f"def test_x():\n    assert {i} == -1" for i in range(8)}
+    )
+
+    pytester.runpytest("--accept-copy", "--accept-jobs=2").assert_outcomes(passed=8)
+
+    assert len(threads) == 2
+    for i in range(8):
+        new_path = pytester.path / f"test_{i}.py.new"
+        assert new_path.read_text() == f"def test_x():\n    assert {i} == {i}"
+
+
+def test_write_errors_reported_in_order(pytester, monkeypatch):
+    """Test that a failed write doesn't stop other files, and is reported the
+    same way whichever thread hits it first"""
+    import pytest_accept
+
+    original_atomic_write = pytest_accept.atomic_write
+
+    def failing_atomic_write(target_path, *args, **kwargs):
+        if target_path.name in ("test_3.py.new", "test_5.py.new"):
+            raise PermissionError(f"can't write {target_path.name}")
+        return original_atomic_write(target_path, *args, **kwargs)
+
+    monkeypatch.setattr(pytest_accept, "atomic_write", failing_atomic_write)
+    pytester.makepyfile(
+        **{f"test_{i}": f"def test_x():\n    assert {i} == -1" for i in range(8)}
+    )
+
+    result = pytester.runpytest("--accept-copy", "--log-cli-level=WARNING")
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    result.stdout.fnmatch_lines(
+        [
+            "*Couldn't write *test_3.py: can't write test_3.py.new",
+            "*Couldn't write *test_5.py: can't write test_5.py.new",
+        ]
+    )
+    assert "INTERNALERROR" not in result.stdout.str() + result.stderr.str()
+    written = sorted(path.name for path in pytester.path.glob("*.new"))
+    assert written == [f"test_{i}.py.new" for i in (0, 1, 2, 4, 6, 7)]
+
+
+def test_accept_jobs_must_be_positive(pytester):
+    pytester.makepyfile("def test_x():\n    assert 1 == 2")
+    result = pytester.runpytest("--accept-copy", "--accept-jobs=0")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--accept-jobs must be at least 1, not 0"])
+
+
+@pytest.mark.parametrize(
+    "durability, expected",
+    [
+        ("none", ["replace"] * 3),
+        ("file", ["fsync file", "replace", "fsync directory"] * 3),
+        ("batch", ["fsync file"] * 3 + ["replace"] * 3 + ["fsync directory"]),
+    ],
+)
+def test_durability(pytester, monkeypatch, durability, expected):
+    """Test which syncs and renames each --accept-durability makes, and in what
+    order"""
+    import stat
+
+    operations = []
+    original_fsync = os.fsync
+    original_replace = os.replace
+
+    def tracking_fsync(fd):
+        is_directory = stat.S_ISDIR(os.fstat(fd).st_mode)
+        operations.append("fsync directory" if is_directory else "fsync file")
+        return original_fsync(fd)
+
+    def tracking_replace(src, dst):
+        operations.append("replace")
+        return original_replace(src, dst)
+
+    monkeypatch.setattr("os.fsync", tracking_fsync)
+    monkeypatch.setattr("os.replace", tracking_replace)
+    pytester.makepyfile(
+        **{f"test_{i}": f"def test_x():\n    assert {i} == -1" for i in range(3)}
+    )
+
+    result = pytester.runpytest(
+        "--accept-copy", f"--accept-durability={durability}", "--accept-jobs=1"
+    )
+    result.assert_outcomes(passed=3)
+
+    if os.name == "nt":
+        # Windows can't sync a directory, so it's skipped
+        expected = [
+            operation for operation in expected if operation != "fsync directory"
+        ]
+    assert operations == expected
+    for i in range(3):
+        new_path = pytester.path / f"test_{i}.py.new"
+        assert new_path.read_text() == f"def test_x():\n    assert {i} == {i}"
+    assert not list(pytester.path.glob(".tmp_*"))
+
+
+def _make_test_files(pytester):
+    contents = {f"test_{i}": f"def test_x():\n    assert {i} == -1" for i in range(3)}
+    pytester.makepyfile(**contents)
+    return {f"{name}.py": text for name, text in contents.items()}
+
+
+def _tree(pytester):
+    """Return the test files, and any temporary files left behind"""
+    return {
+        path.name: path.read_text()
+        for path in pytester.path.iterdir()
+        if path.name.startswith(("test_", ".tmp_"))
+    }
+
+
+def test_transaction_writes_all_files(pytester):
+    originals = _make_test_files(pytester)
+
+    # In a subprocess, since other tests set the plugin's log level in-process
+    result = pytester.runpytest_subprocess(
+        "--accept", "--accept-transaction", "--log-cli-level=INFO"
+    )
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines(["*pytest-accept: Wrote 3 files in one transaction"])
+
+    assert _tree(pytester) == {
+        name: text.replace("== -1", f"== {name[5]}") for name, text in originals.items()
+    }
+
+
+def test_transaction_writes_nothing_if_a_file_fails(pytester, monkeypatch):
+    """Test that if one file can't be written, the others aren't either"""
+    import pytest_accept.common
+
+    original_write_temp = pytest_accept.common._write_temp
+
+    def failing_write_temp(target_path, *args, **kwargs):
+        if target_path.name == "test_1.py":
+            raise OSError("disk full")
+        return original_write_temp(target_path, *args, **kwargs)
+
+    monkeypatch.setattr(pytest_accept.common, "_write_temp", failing_write_temp)
+    originals = _make_test_files(pytester)
+
+    result = pytester.runpytest(
+        "--accept", "--accept-transaction", "--log-cli-level=WARNING"
+    )
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    result.stdout.fnmatch_lines(
+        [
+            "*Couldn't write *test_1.py: disk full",
+            "*Not writing any files, since some couldn't be",
+        ]
+    )
+    # Neither the other files nor their temporary files are left behind
+    assert _tree(pytester) == originals
+
+
+def test_transaction_rolled_back_if_a_rename_fails(pytester, monkeypatch):
+    """Test that files already renamed into place are restored if a later rename
+    fails"""
+    original_replace = os.replace
+
+    def failing_replace(src, dst):
+        if Path(dst).name == "test_2.py" and Path(src).name.startswith(".tmp_"):
+            raise OSError("rename failed")
+        return original_replace(src, dst)
+
+    monkeypatch.setattr("os.replace", failing_replace)
+    originals = _make_test_files(pytester)
+
+    result = pytester.runpytest(
+        "--accept", "--accept-transaction", "--log-cli-level=WARNING"
+    )
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    result.stdout.fnmatch_lines(
+        ["*Rolled back all 3 files, since one couldn't be written: rename failed"]
+    )
+    assert _tree(pytester) == originals
+
+
+def test_transaction_writes_nothing_if_a_file_changed(pytester):
+    """Test that a file changed during the run stops the others being written"""
+    originals = _make_test_files(pytester)
+    changing = """\
+from pathlib import Path
+
+def test_x():
+    Path(__file__).write_text(Path(__file__).read_text() + "# changed")
+    assert 1 == 2"""
+    pytester.makepyfile(test_changing=changing)
+
+    result = pytester.runpytest(
+        "--accept", "--accept-transaction", "--log-cli-level=WARNING"
+    )
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    result.stdout.fnmatch_lines(
+        [
+            "*File changed since start of test, not writing results: *test_changing.py",
+            "*Not writing any files, since some couldn't be",
+        ]
+    )
+    assert _tree(pytester) == originals | {"test_changing.py": changing + "# changed"}
@@ -1,11 +1,9 @@
-def test_complex_assertion_warning(pytester):
-    """Test that complex assertions trigger a warning and are skipped"""
-    # Create a test with an assertion that exceeds the complexity threshold
-    # We simulate what pytest's assertion rewriter would generate
+def test_complex_assertion_no_warning(pytester):
+    """Test that complex assertions are rewritten without a warning"""
     test_contents = """
 def test_complex():
-    # This would normally be rewritten by pytest into many AST nodes
-    # We'll create an assertion with many comparisons to trigger the threshold
+    # Rewritten by pytest into many AST nodes, compared against a literal so
+    # it's one we can accept
     assert (
         1 == 1 and 2 == 2 and 3 == 3 and 4 == 4 and 5 == 5 and
         6 == 6 and 7 == 7 and 8 == 8 and 9 == 9 and 10 == 10 and
@@ -22,38 +20,21 @@ def test_complex():
         61 == 61 and 62 == 62 and 63 == 63 and 64 == 64 and 65 == 65 and
         66 == 66 and 67 == 67 and 68 == 68 and 69 == 69 and 70 == 70 and
         71 == 71 and 72 == 72 and 73 == 73 and 74 == 74 and 75 == 75
-    )
+    ) == True
 """
-    path = pytester.makepyfile(test_contents)
+    pytester.makepyfile(test_contents)
 
-    # Run with accept mode and capture warnings via log output
     result = pytester.runpytest("--accept-copy", "--log-cli-level=WARNING")
 
     # The test should pass (all comparisons are true)
     result.assert_outcomes(passed=1)
-
-    # Check that the warning was logged - the warning appears in the captured log
-    # Since the warning is logged, we check for it in the output
-    assert "Skipping accept mode for a complex assertion" in result.stdout.str()
-    assert (
-        "This assertion will fail normally and won't be auto-corrected"
-        in result.stdout.str()
-    )
-    assert (
-        "To fix: simplify the assertion or manually update the expected value"
-        in result.stdout.str()
-    )
-
-    # The .new file should not be created since no assertions were rewritten
-    assert not (path.parent / (path.name + ".new")).exists()
+    assert "complex assertion" not in result.stdout.str()
 
 
-def test_complex_assertion_fails_normally(pytester):
-    """Test that complex assertions that fail are not auto-corrected"""
-    # Create a test with a complex assertion that will fail
+def test_complex_assertion_accepted(pytester):
+    """Test that failing complex assertions are accepted like any other"""
     test_contents = """
 def test_complex_fail():
-    # Complex assertion with a failure
     assert (
         1 == 1 and 2 == 2 and 3 == 3 and 4 == 4 and 5 == 5 and
         6 == 6 and 7 == 7 and 8 == 8 and 9 == 9 and 10 == 10 and
@@ -70,25 +51,31 @@ def test_complex_fail():
         61 == 61 and 62 == 62 and 63 == 63 and 64 == 64 and 65 == 65 and
         66 == 66 and 67 == 67 and 68 == 68 and 69 == 69 and 70 == 70 and
         71 == 71 and 72 == 72 and 73 == 73 and 74 == 74 and 75 == 99  # This fails
-    )
+    ) == True
 """
     path = pytester.makepyfile(test_contents)
 
-    # Run with accept mode and capture warnings via log output
-    result = pytester.runpytest("--accept-copy", "--log-cli-level=WARNING")
+    result = pytester.runpytest("--accept-copy")
+    result.assert_outcomes(passed=1)
 
-    # The test should fail because the assertion is not wrapped in try-except
-    result.assert_outcomes(failed=1)
+    with open(path.parent / (path.name + ".new")) as f:
+        assert f.read() == test_contents.strip().replace(") == True", ") == False")
 
-    # Check that the warning was logged
-    assert "Skipping accept mode for a complex assertion" in result.stdout.str()
-    assert (
-        "This assertion will fail normally and won't be auto-corrected"
-        in result.stdout.str()
+
+def test_many_assertions(pytester):
+    """Test that every assertion in a large generated module is accepted"""
+    test_contents = "def test_many():\n" + "".join(
+        f"    assert {i} == -1\n" for i in range(2000)
     )
+    path = pytester.makepyfile(test_contents)
 
-    # The .new file should not be created
-    assert not (path.parent / (path.name + ".new")).exists()
+    result = pytester.runpytest("--accept-copy")
+    result.assert_outcomes(passed=1)
+
+    with open(path.parent / (path.name + ".new")) as f:
+        assert f.read() == "def test_many():\n" + "\n".join(
+            f"    assert {i} == {i}" for i in range(2000)
+        )
 
 
 def test_simple_assertion_still_works(pytester):
@@ -111,8 +98,5 @@ def test_simple():
     with open(new_path) as f:
         content = f.read()
         assert "assert 1 == 1" in content
-        # Check for both single and double quotes since Python may use either
-        assert (
-            "assert 'hello' == 'hello'" in content
-            or 'assert "hello" == "hello"' in content
-        )
+        # Only the expected value is replaced, written as its repr
+        assert """assert "hello" == 'hello'""" in content
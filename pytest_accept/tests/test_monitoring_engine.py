@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pytest
+
+requires_monitoring = pytest.mark.skipif(
+    sys.version_info < (3, 12), reason="sys.monitoring requires Python 3.12"
+)
+
+
+@requires_monitoring
+def test_accepts_first_failure(pytester):
+    test_contents = "def test_x():\n    assert 1 == 3\n    assert 2 == 3\n"
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy", "--accept-engine=monitoring")
+    # The test stops at the first failing assert, so it still fails
+    result.assert_outcomes(failed=1)
+
+    with open(str(path) + ".new") as f:
+        assert f.read() == test_contents.replace("1 == 3", "1 == 1").rstrip()
+
+
+@requires_monitoring
+def test_replaces_only_expected_value(pytester):
+    test_contents = (
+        "def test_x():\n"
+        "    value = 'héllo'\n"
+        "    x = 1; assert value == 'hello'  # keep\n"
+        "    assert value * 2 == [\n"
+        "        1,\n"
+        "    ]\n"
+    )
+    path = pytester.makepyfile(test_contents)
+    # One failing assert is accepted per run
+    pytester.runpytest("--accept", "--accept-engine=monitoring")
+    pytester.runpytest("--accept", "--accept-engine=monitoring")
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == (
+            "def test_x():\n"
+            "    value = 'héllo'\n"
+            "    x = 1; assert value == 'héllo'  # keep\n"
+            "    assert value * 2 == 'héllohéllo'"
+        )
+
+
+@requires_monitoring
+def test_caught_assertion_not_accepted(pytester):
+    test_contents = """\
+import pytest
+
+def test_x():
+    with pytest.raises(AssertionError):
+        assert 1 == 2
+
+def test_y():
+    with pytest.raises(AssertionError):
+        assert 1 == 2
+    raise ValueError
+"""
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy", "--accept-engine=monitoring")
+    result.assert_outcomes(passed=1, failed=1)
+
+    assert not os.path.exists(str(path) + ".new")
+
+
+@requires_monitoring
+def test_unacceptable_asserts_fail_normally(pytester):
+    test_contents = """\
+def test_message():
+    assert 1 == 2, "message"
+
+def test_neq():
+    assert 1 != 1
+
+def test_not_literal():
+    x = 2
+    assert 1 == x
+"""
+    path = pytester.makepyfile(test_contents)
+    result = pytester.runpytest("--accept-copy", "--accept-engine=monitoring")
+    result.assert_outcomes(failed=3)
+
+    assert not os.path.exists(str(path) + ".new")
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="sys.monitoring is available")
+def test_requires_python_312(pytester):
+    pytester.makepyfile("def test_x():\n    assert 1 == 2\n")
+    result = pytester.runpytest("--accept-copy", "--accept-engine=monitoring")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--accept-engine=monitoring requires Python 3.12*"])
@@ -36,6 +36,6 @@ def test_plugin_works_without_xdist(pytester):
 
     content = new_file.read_text()
     assert "assert 1 == 1" in content, "First assertion should be fixed"
-    assert (
-        "assert 'hello' == 'hello'" in content or 'assert "hello" == "hello"' in content
-    ), "Second assertion should be fixed"
+    assert """assert "hello" == 'hello'""" in content, (
+        "Second assertion should be fixed"
+    )
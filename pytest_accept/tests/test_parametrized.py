@@ -6,12 +6,12 @@ def test_parametrized_tests_work(pytester):
     test_contents = """
 import pytest
 
-@pytest.mark.parametrize("a,b", [(1, 2), (3, 4), (5, 6)])
+@pytest.mark.parametrize("a,b", [(1, 2), (2, 1), (0, 3)])
 def test_parametrized_addition(a, b):
     # These assertions have literal values on the right side
     assert a + b == 10  # Wrong literal value
 
-@pytest.mark.parametrize("name", ["alice", "bob", "charlie"])
+@pytest.mark.parametrize("name", ["alice", "bobby", "chuck"])
 def test_parametrized_string(name):
     assert len(name) == 10  # Wrong literal value
 """
@@ -27,9 +27,37 @@ def test_parametrized_string(name):
 
     with open(new_path) as f:
         content = f.read()
-        # Check that assertions were rewritten for each parametrized case
-        assert "assert a + b == 3" in content  # 1 + 2
-        assert "assert len(name) == 5" in content  # len("alice")
+        # Every parametrized case agrees, so there's one value to accept
+        assert "assert a + b == 3" in content
+        assert "assert len(name) == 5" in content
+
+
+def test_parametrized_conflicting_values(pytester):
+    """Test that a site getting different values from each case isn't accepted"""
+    test_contents = """
+import pytest
+
+@pytest.mark.parametrize("a,b", [(1, 2), (3, 4), (5, 6)])
+def test_parametrized_addition(a, b):
+    assert a + b == 10
+
+def test_agrees():
+    assert 1 + 1 == 3
+"""
+    path = pytester.makepyfile(test_contents)
+
+    result = pytester.runpytest("--accept-copy", "--log-cli-level=WARNING")
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "*Not accepting *test_parametrized_conflicting_values.py:5, which got "
+            "different values in different runs*"
+        ]
+    )
+
+    # Other sites in the file are still accepted
+    with open(str(path) + ".new") as f:
+        assert f.read() == test_contents.strip().replace("1 + 1 == 3", "1 + 1 == 2")
 
 
 def test_parametrized_with_fixtures(pytester):
@@ -44,7 +72,7 @@ def multiplier():
 @pytest.mark.parametrize("value", [5, 10, 15])
 def test_with_fixture_and_param(value, multiplier):
     # This has a literal on the right side, should work
-    assert value * multiplier == 100  # Wrong literal
+    assert value * multiplier % 10 == 3  # Wrong literal
 """
     path = pytester.makepyfile(test_contents)
 
@@ -56,4 +84,4 @@ def test_with_fixture_and_param(value, multiplier):
 
     with open(new_path) as f:
         content = f.read()
-        assert "assert value * multiplier == 10" in content  # 5 * 2
+        assert "assert value * multiplier % 10 == 0" in content
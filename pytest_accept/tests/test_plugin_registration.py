@@ -0,0 +1,38 @@
+"""Test that the plugin only registers its hooks in accept mode"""
+
+import pytest
+
+PER_FILE_AND_TEST_HOOKS = [
+    "pytest_collect_file",
+    "pytest_collection_modifyitems",
+    "pytest_runtest_protocol",
+    "pytest_runtest_makereport",
+    "pytest_assertrepr_compare",
+]
+
+
+def _accept_hooks(config):
+    return {
+        name
+        for name in PER_FILE_AND_TEST_HOOKS
+        for impl in getattr(config.hook, name).get_hookimpls()
+        if impl.function.__module__.startswith("pytest_accept")
+    }
+
+
+def test_inactive_plugin_registers_no_hooks(pytester):
+    config = pytester.parseconfigure()
+    assert _accept_hooks(config) == set()
+    # Doctests stop at their first failure, as without the plugin
+    assert not config.option.doctest_continue_on_failure
+
+
+@pytest.mark.parametrize("option", ["--accept", "--accept-copy"])
+def test_accept_registers_hooks(pytester, option):
+    config = pytester.parseconfigure(option)
+    assert _accept_hooks(config) == {
+        "pytest_collect_file",
+        "pytest_runtest_protocol",
+        "pytest_runtest_makereport",
+    }
+    assert config.option.doctest_continue_on_failure
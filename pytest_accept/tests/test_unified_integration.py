@@ -3,6 +3,8 @@
 import textwrap
 from pathlib import Path
 
+import pytest
+
 
 def test_both_plugins_simple_case(pytester):
     """Test assert and doctest changes in separate functions"""
@@ -395,18 +397,18 @@ def test_complete_file_contents_preserved(pytester):
     def test_calculations():
         """Test our calculation functions"""
         # Test basic calculation
-        assert calculate(3, 4) == 5.0
+        assert calculate(3, 4) == 5.0    # Should be 5.0
 
         # Test helper class
         helper = Helper(3)
-        assert helper.transform(4) == 12
+        assert helper.transform(4) == 12  # Should be 12
 
         # Test edge cases
-        assert calculate(0, 0) == 0.0
+        assert calculate(0, 0) == 0.0     # Should be 0.0
 
         # Another calculation
         result = calculate(1, 1)
-        assert result == 1.4142135623730951
+        assert result == 1.4142135623730951             # Should be ~1.414
 
     # End of file comment
     ''').strip()
@@ -433,3 +435,102 @@ Diff lines:
 Expected lines: {len(expected_normalized.split(chr(10)))}
 Got lines: {len(corrected_normalized.split(chr(10)))}
 """
+
+
+def test_assert_changing_line_count_before_doctest(pytester):
+    """Test that a doctest after an assert that changes the number of lines is
+    still written in the right place"""
+    test_contents = textwrap.dedent('''
+    def test_assertion():
+        assert [1, 2] == [
+            1,
+            3,
+        ]
+
+    def double(x):
+        """
+        >>> double(2)
+        5
+        """
+        return x * 2
+    ''').strip()
+
+    path = pytester.makepyfile(test_contents)
+    pytester.runpytest("--doctest-modules", "--accept-copy")
+
+    with open(str(path) + ".new") as f:
+        assert (
+            f.read()
+            == textwrap.dedent('''
+        def test_assertion():
+            assert [1, 2] == [1, 2]
+
+        def double(x):
+            """
+            >>> double(2)
+            4
+            """
+            return x * 2
+        ''').strip()
+        )
+
+
+def test_overlapping_changes_rejected():
+    """Test that of two changes to the same part of a file, only one is applied"""
+    from pytest_accept import AssertChange, DoctestChange, _apply_changes
+
+    original = b">>> f()\n1\nassert x == 2\n"
+    assert_change = AssertChange(
+        priority=1, location=slice(3, 3), columns=(12, 13), source="3"
+    )
+    # Replaces the output and the assert after it
+    doctest_change = DoctestChange(
+        priority=2, location=slice(1, 3), source_line=0, output="2"
+    )
+
+    pieces, rejected = _apply_changes(original, [assert_change, doctest_change])
+    assert b"".join(pieces) == b">>> f()\n2\n"
+    assert rejected == [assert_change]
+
+    pieces, rejected = _apply_changes(original, [assert_change])
+    assert b"".join(pieces) == b">>> f()\n1\nassert x == 3\n"
+    assert rejected == []
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("final_newline", [True, False])
+def test_line_endings_preserved(pytester, newline, final_newline):
+    """Test that a file's line endings, and whether it ends with one, are kept"""
+    lines = [
+        "def double(x):",
+        '    """',
+        "    >>> double(2)",
+        "    5",
+        '    """',
+        "    return x * 2",
+        "",
+        "def test_assertion():",
+        "    assert double(1) == 3",
+    ]
+    path = pytester.path / "test_line_endings.py"
+    path.write_bytes((newline.join(lines) + newline * final_newline).encode())
+
+    pytester.runpytest("--doctest-modules", "--accept-copy")
+
+    lines[3] = "    4"
+    lines[8] = "    assert double(1) == 2"
+    assert (
+        Path(str(path) + ".new").read_bytes()
+        == (newline.join(lines) + newline * final_newline).encode()
+    )
+
+
+@pytest.mark.parametrize("want", ["", "\n    5"])
+def test_doctest_at_end_of_file_without_final_newline(pytester, want):
+    """Test doctest output at the very end of a file without a final newline"""
+    path = pytester.path / "test_doc.txt"
+    path.write_bytes(f"    >>> print(4){want}".encode())
+
+    pytester.runpytest("--accept-copy")
+
+    assert Path(str(path) + ".new").read_bytes() == b"    >>> print(4)\n    4"